@@ -3,6 +3,40 @@ import numpy as np
 import pynance as pn
 from textblob import TextBlob
 import matplotlib.pyplot as plt
+from scripts.instrumentation import NULL_PROFILER
+from scripts.pipeline import Pipeline, Stage, is_settled
+from scripts.rollingCorrelation import rolling_correlation
+from scripts.timestamps import parse_timestamps, session_dates
+
+def _fetch_prices(ticker, start_date, end_date):
+    stock_data = pn.data.get(ticker, start=start_date, end=end_date)
+    if 'Adj Close' in stock_data.columns:
+        stock_data['Price_Change'] = stock_data['Adj Close'].pct_change()
+    elif 'Close' in stock_data.columns:
+        stock_data['Price_Change'] = stock_data['Close'].pct_change()
+    return stock_data
+
+def _headline_sentiment(headlines):
+    def get_sentiment(text):
+        return TextBlob(text).sentiment.polarity
+
+    return headlines.apply(get_sentiment).rename('Sentiment')
+
+def _session_dates(news_data):
+    # Trading session of each headline, matching the price index
+    if 'session_date' in news_data.columns:
+        return news_data['session_date']
+    return session_dates(parse_timestamps(news_data['date']))
+
+def _daily_sentiment(news_data):
+    return _headline_sentiment(news_data['headline']).groupby(_session_dates(news_data)).mean()
+
+def _correlate(stock_data, sentiment_scores):
+    # Merge sentiment scores with stock data
+    combined_data = pd.merge(stock_data, sentiment_scores, left_index=True, right_index=True, how='inner')
+
+    # Calculate correlation
+    return combined_data['Price_Change'].corr(combined_data['Sentiment'])
 
 class NewsStockCorrelation:
     def __init__(self, ticker, news_data):
@@ -25,34 +59,32 @@ class NewsStockCorrelation:
         :param start_date: Start date for fetching data in 'YYYY-MM-DD' format.
         :param end_date: End date for fetching data in 'YYYY-MM-DD' format.
         """
-        self.stock_data = pn.data.get(self.ticker, start=start_date, end=end_date)
-        if 'Adj Close' in self.stock_data.columns:
-                self.stock_data['Price_Change'] = self.stock_data['Adj Close'].pct_change()
-                # df['Adj_Close'] = df['Adj Close']
-        elif 'Close' in self.stock_data.columns:
-                self.stock_data['Price_Change'] = self.stock_data['Close'].pct_change()
-                # df['Adj_Close'] = df['Close']
+        self.stock_data = _fetch_prices(self.ticker, start_date, end_date)
 
     def analyze_sentiment(self):
         """
         Analyzes the sentiment of the news headlines using TextBlob.
         """
-        def get_sentiment(text):
-            return TextBlob(text).sentiment.polarity
-
-        self.news_data['Sentiment'] = self.news_data['headline'].apply(get_sentiment)
-        self.sentiment_scores = self.news_data.groupby('date')['Sentiment'].mean()
+        self.news_data['Sentiment'] = _headline_sentiment(self.news_data['headline'])
+        self.sentiment_scores = self.news_data['Sentiment'].groupby(_session_dates(self.news_data)).mean()
 
     def calculate_correlation(self):
         """
         Calculates the correlation between news sentiment and stock price movements.
         """
-        # Merge sentiment scores with stock data
-        combined_data = pd.merge(self.stock_data, self.sentiment_scores, left_index=True, right_index=True, how='inner')
+        return _correlate(self.stock_data, self.sentiment_scores)
 
-        # Calculate correlation
-        correlation = combined_data['Price_Change'].corr(combined_data['Sentiment'])
-        return correlation
+    def calculate_rolling_correlation(self, window=20, min_periods=None):
+        """
+        Calculates the rolling correlation between news sentiment and stock price movements.
+
+        :param window: Number of trading days in each window (default is 20).
+        :param min_periods: Minimum number of days with both news and a price change (default is window // 2).
+        :return: A Series of correlations indexed by trading day.
+        """
+        sentiment = self.sentiment_scores.reindex(self.stock_data.index).to_frame(self.ticker)
+        price_change = self.stock_data[['Price_Change']].set_axis([self.ticker], axis=1)
+        return rolling_correlation(sentiment, price_change, window, min_periods)[self.ticker]
 
     def plot_correlation(self):
         """
@@ -79,29 +111,78 @@ class NewsStockCorrelation:
         plt.tight_layout()
         plt.show()
 
-    def run_analysis(self, start_date, end_date):
+    def run_analysis(self, start_date, end_date, profiler=NULL_PROFILER):
         """
         Runs the complete analysis pipeline.
 
         :param start_date: Start date for fetching data in 'YYYY-MM-DD' format.
         :param end_date: End date for fetching data in 'YYYY-MM-DD' format.
+        :param profiler: Optional PipelineProfiler recording timing and memory for each stage.
         :return: Correlation coefficient between news sentiment and stock price movements.
         """
-        self.fetch_stock_data(start_date, end_date)
-        self.analyze_sentiment()
-        correlation = self.calculate_correlation()
-        self.plot_correlation()
+        with profiler.stage('fetch', ticker=self.ticker) as stage:
+            self.fetch_stock_data(start_date, end_date)
+            stage.add_rows(self.stock_data)
+        with profiler.stage('sentiment', ticker=self.ticker, rows=len(self.news_data)):
+            self.analyze_sentiment()
+        with profiler.stage('merge', ticker=self.ticker):
+            correlation = self.calculate_correlation()
+        with profiler.stage('plot', ticker=self.ticker):
+            self.plot_correlation()
         return correlation
 
-# Example usage:
+    def build_pipeline(self, start_date, end_date, cache_dir=None, profiler=NULL_PROFILER):
+        """
+        Builds the fetch -> sentiment -> correlate pipeline as declarative stages.
+
+        Price fetching and sentiment scoring do not depend on each other and run concurrently.
+        With a cache_dir, a stage is only recomputed when its inputs or parameters change, so a
+        new date range refetches prices but reuses the cached sentiment scores. Prices are only
+        cached for ranges ending before today, since later bars are still to come.
+
+        :param start_date: Start date for fetching data in 'YYYY-MM-DD' format.
+        :param end_date: End date for fetching data in 'YYYY-MM-DD' format.
+        :param cache_dir: Directory for memoized stage outputs. If None, nothing is cached.
+        :param profiler: Optional PipelineProfiler recording each executed stage.
+        :return: A Pipeline with 'fetch', 'sentiment' and 'correlate' stages.
+        """
+        # Session dates already computed by timestamps.load_news() are reused instead of reparsed
+        news_columns = [column for column in ('date', 'headline', 'session_date') if column in self.news_data.columns]
+        return Pipeline([
+            Stage('fetch', _fetch_prices,
+                  params={'ticker': self.ticker, 'start_date': start_date, 'end_date': end_date},
+                  cache=is_settled(end_date)),
+            Stage('sentiment', _daily_sentiment, params={'news_data': self.news_data[news_columns]}),
+            Stage('correlate', _correlate, inputs=('fetch', 'sentiment')),
+        ], cache_dir=cache_dir, profiler=profiler)
+
+    def run_pipeline(self, start_date, end_date, cache_dir='.pipeline_cache', plot=True, profiler=NULL_PROFILER):
+        """
+        Runs the analysis through the memoized pipeline instead of recomputing every step.
 
-# Sample news data
-news_data = pd.read_csv('./Data/raw_analyst_ratings.csv')
+        :param start_date: Start date for fetching data in 'YYYY-MM-DD' format.
+        :param end_date: End date for fetching data in 'YYYY-MM-DD' format.
+        :param cache_dir: Directory for memoized stage outputs (default is '.pipeline_cache').
+        :param plot: Whether to plot the results.
+        :param profiler: Optional PipelineProfiler recording each executed stage.
+        :return: Correlation coefficient between news sentiment and stock price movements.
+        """
+        outputs = self.build_pipeline(start_date, end_date, cache_dir=cache_dir, profiler=profiler).run()
+        self.stock_data = outputs['fetch']
+        self.sentiment_scores = outputs['sentiment']
+        if plot:
+            self.plot_correlation()
+        return outputs['correlate']
+
+# Example usage:
+if __name__ == '__main__':
+    # Sample news data
+    news_data = pd.read_csv('./Data/raw_analyst_ratings.csv')
 
-# Initialize the correlation analysis class
-ticker = 'AAPL'
-correlation_analysis = NewsStockCorrelation(ticker, news_data)
+    # Initialize the correlation analysis class
+    ticker = 'AAPL'
+    correlation_analysis = NewsStockCorrelation(ticker, news_data)
 
-# Run the analysis
-correlation_coefficient = correlation_analysis.run_analysis('2011-04-27', '2020-06-11')
-print(f'Correlation coefficient between news sentiment and {ticker} stock price movements: {correlation_coefficient}')
+    # Run the analysis
+    correlation_coefficient = correlation_analysis.run_analysis('2011-04-27', '2020-06-11')
+    print(f'Correlation coefficient between news sentiment and {ticker} stock price movements: {correlation_coefficient}')
@@ -2,18 +2,37 @@ import pandas as pd
 import numpy as np
 import talib
 import matplotlib.pyplot as plt
+from scripts.compactFrame import ColumnSink
+from scripts.indicatorCache import NULL_CACHE
 
 class QuantitativeAnalysis:
-    def __init__(self, df, price_column='Close'):
+    def __init__(self, df, price_column='Close', compact=False, side_frame=False, memory_budget=None, spill_dir=None,
+                 ticker=None, cache=NULL_CACHE):
         """
         Initialize the QuantitativeAnalysis class.
         
         Parameters:
         df (pd.DataFrame): DataFrame containing stock data with at least 'Close' prices.
         price_column (str): The name of the column containing the closing prices. Default is 'Close'.
+        compact (bool): Store indicator outputs as float32. Default is False.
+        side_frame (bool): Write indicators to self.output instead of adding columns to df. Default is False.
+        memory_budget (int): Maximum bytes of indicator columns; older or intermediate ones are spilled
+            to spill_dir (or dropped) when exceeded. Default is None (no limit).
+        spill_dir (str): Directory for spilled indicator columns. Default is None.
+        ticker (str): Ticker of df, used in the indicator cache keys. Default is None.
+        cache (IndicatorCache): Memoizes talib results for unchanged price history. Default is no caching.
         """
         self.df = df
         self.price_column = price_column
+        self.sink = ColumnSink(df, compact=compact, side_frame=side_frame, memory_budget=memory_budget,
+                               spill_dir=spill_dir)
+        self.output = self.sink.output
+        self.ticker = ticker
+        self.cache = cache
+
+    def _indicators(self):
+        # Hashes the price series once per calculate_* call
+        return self.cache.bind(self.ticker, self.df[self.price_column])
 
     def calculate_moving_averages(self, short_window=50, long_window=200):
         """
@@ -23,9 +42,10 @@ class QuantitativeAnalysis:
         short_window (int): The period for the short-term moving average (e.g., 50 days).
         long_window (int): The period for the long-term moving average (e.g., 200 days).
         """
-        self.df['SMA_' + str(short_window)] = talib.SMA(self.df[self.price_column], timeperiod=short_window)
-        self.df['SMA_' + str(long_window)] = talib.SMA(self.df[self.price_column], timeperiod=long_window)
-        self.df['EMA_' + str(short_window)] = talib.EMA(self.df[self.price_column], timeperiod=short_window)
+        indicators = self._indicators()
+        self.sink.assign('SMA_' + str(short_window), indicators.compute('SMA', talib.SMA, timeperiod=short_window))
+        self.sink.assign('SMA_' + str(long_window), indicators.compute('SMA', talib.SMA, timeperiod=long_window))
+        self.sink.assign('EMA_' + str(short_window), indicators.compute('EMA', talib.EMA, timeperiod=short_window))
     
     def calculate_rsi(self, period=14):
         """
@@ -34,7 +54,7 @@ class QuantitativeAnalysis:
         Parameters:
         period (int): The period for calculating RSI. Default is 14 days.
         """
-        self.df['RSI'] = talib.RSI(self.df[self.price_column], timeperiod=period)
+        self.sink.assign('RSI', self._indicators().compute('RSI', talib.RSI, timeperiod=period))
     
     def calculate_bollinger_bands(self, period=20, nbdevup=2, nbdevdn=2):
         """
@@ -45,9 +65,12 @@ class QuantitativeAnalysis:
         nbdevup (int): Number of standard deviations for the upper band. Default is 2.
         nbdevdn (int): Number of standard deviations for the lower band. Default is 2.
         """
-        self.df['upper_band'], self.df['middle_band'], self.df['lower_band'] = talib.BBANDS(
-            self.df[self.price_column], timeperiod=period, nbdevup=nbdevup, nbdevdn=nbdevdn
+        upper_band, middle_band, lower_band = self._indicators().compute(
+            'BBANDS', talib.BBANDS, timeperiod=period, nbdevup=nbdevup, nbdevdn=nbdevdn
         )
+        self.sink.assign('upper_band', upper_band)
+        self.sink.assign('middle_band', middle_band)
+        self.sink.assign('lower_band', lower_band)
     
     def calculate_macd(self, fastperiod=12, slowperiod=26, signalperiod=9):
         """
@@ -58,9 +81,12 @@ class QuantitativeAnalysis:
         slowperiod (int): The period for the slow EMA. Default is 26 days.
         signalperiod (int): The period for the signal line. Default is 9 days.
         """
-        self.df['MACD'], self.df['MACD_signal'], self.df['MACD_hist'] = talib.MACD(
-            self.df[self.price_column], fastperiod=fastperiod, slowperiod=slowperiod, signalperiod=signalperiod
+        macd, macd_signal, macd_hist = self._indicators().compute(
+            'MACD', talib.MACD, fastperiod=fastperiod, slowperiod=slowperiod, signalperiod=signalperiod
         )
+        self.sink.assign('MACD', macd)
+        self.sink.assign('MACD_signal', macd_signal)
+        self.sink.assign('MACD_hist', macd_hist)
     
     def calculate_volatility(self, window=252):
         """
@@ -74,7 +100,7 @@ class QuantitativeAnalysis:
         """
         daily_returns = self.df[self.price_column].pct_change()
         volatility = daily_returns.rolling(window=window).std() * np.sqrt(window)
-        self.df['Volatility'] = volatility
+        self.sink.assign('Volatility', volatility, intermediate=True)
         return volatility.iloc[-1]
 
     def calculate_sharpe_ratio(self, risk_free_rate=0.01, window=252):
@@ -91,7 +117,7 @@ class QuantitativeAnalysis:
         daily_returns = self.df[self.price_column].pct_change()
         excess_returns = daily_returns - (risk_free_rate / window)
         sharpe_ratio = np.sqrt(window) * excess_returns.mean() / excess_returns.std()
-        self.df['Sharpe_Ratio'] = sharpe_ratio
+        self.sink.assign('Sharpe_Ratio', sharpe_ratio, intermediate=True)
         return sharpe_ratio
     
     def plot_technical_indicators(self, ticker):
@@ -103,15 +129,15 @@ class QuantitativeAnalysis:
         """
         plt.figure(figsize=(14, 7))
         plt.plot(self.df[self.price_column], label=f'{ticker} Close Price', color='blue')
-        plt.plot(self.df['SMA_50'], label='50-day SMA', color='red')
-        plt.plot(self.df['SMA_200'], label='200-day SMA', color='green')
-        plt.plot(self.df['EMA_50'], label='50-day EMA', color='orange')
+        plt.plot(self.sink.column('SMA_50'), label='50-day SMA', color='red')
+        plt.plot(self.sink.column('SMA_200'), label='200-day SMA', color='green')
+        plt.plot(self.sink.column('EMA_50'), label='50-day EMA', color='orange')
         plt.title(f'{ticker} - Technical Analysis')
         plt.legend()
         plt.show()
         
         plt.figure(figsize=(14, 7))
-        plt.plot(self.df['RSI'], label=f'{ticker} RSI', color='purple')
+        plt.plot(self.sink.column('RSI'), label=f'{ticker} RSI', color='purple')
         plt.axhline(70, color='red', linestyle='--')
         plt.axhline(30, color='green', linestyle='--')
         plt.title(f'{ticker} - Relative Strength Index')
@@ -120,17 +146,17 @@ class QuantitativeAnalysis:
         
         plt.figure(figsize=(14, 7))
         plt.plot(self.df[self.price_column], label=f'{ticker} Close Price', color='blue')
-        plt.plot(self.df['upper_band'], label='Upper Bollinger Band', color='red')
-        plt.plot(self.df['middle_band'], label='Middle Bollinger Band', color='green')
-        plt.plot(self.df['lower_band'], label='Lower Bollinger Band', color='red')
+        plt.plot(self.sink.column('upper_band'), label='Upper Bollinger Band', color='red')
+        plt.plot(self.sink.column('middle_band'), label='Middle Bollinger Band', color='green')
+        plt.plot(self.sink.column('lower_band'), label='Lower Bollinger Band', color='red')
         plt.title(f'{ticker} - Bollinger Bands')
         plt.legend()
         plt.show()
         
         plt.figure(figsize=(14, 7))
-        plt.plot(self.df['MACD'], label='MACD', color='blue')
-        plt.plot(self.df['MACD_signal'], label='Signal Line', color='red')
-        plt.bar(self.df.index, self.df['MACD_hist'], label='MACD Histogram', color='gray')
+        plt.plot(self.sink.column('MACD'), label='MACD', color='blue')
+        plt.plot(self.sink.column('MACD_signal'), label='Signal Line', color='red')
+        plt.bar(self.df.index, self.sink.column('MACD_hist'), label='MACD Histogram', color='gray')
         plt.title(f'{ticker} - MACD')
         plt.legend()
         plt.show()
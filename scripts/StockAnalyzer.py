@@ -1,13 +1,16 @@
 import yfinance as yf
 import talib
 import matplotlib.pyplot as plt
+from scripts.indicatorCache import NULL_CACHE
+from scripts.pricePanel import PricePanel
 
 class StockAnalyzer:
-    def __init__(self, tickers, start_date, end_date):
+    def __init__(self, tickers, start_date, end_date, cache=NULL_CACHE):
         self.tickers = tickers
         self.start_date = start_date
         self.end_date = end_date
         self.data = {}
+        self.cache = cache
 
     def download_data(self):
         self.data = {ticker: yf.download(ticker, start=self.start_date, end=self.end_date) for ticker in self.tickers}
@@ -15,13 +18,27 @@ class StockAnalyzer:
     def calculate_indicators(self):
         for ticker in self.tickers:
             df = self.data[ticker]
-            df['SMA'] = talib.SMA(df['Close'], timeperiod=30)
-            df['EMA'] = talib.EMA(df['Close'], timeperiod=30)
-            df['RSI'] = talib.RSI(df['Close'], timeperiod=14)
-            df['MACD'], df['MACD_signal'], df['MACD_hist'] = talib.MACD(df['Close'], fastperiod=12, slowperiod=26, signalperiod=9)
-            df['BB_upper'], df['BB_middle'], df['BB_lower'] = talib.BBANDS(df['Close'], timeperiod=20)
-            df['ATR'] = talib.ATR(df['High'], df['Low'], df['Close'], timeperiod=14)
-            df['ADX'] = talib.ADX(df['High'], df['Low'], df['Close'], timeperiod=14)
+            # Hash only the input columns, not the indicator columns added below
+            indicators = self.cache.bind(ticker, df[['High', 'Low', 'Close']])
+            df['SMA'] = indicators.compute('SMA', talib.SMA, 'Close', timeperiod=30)
+            df['EMA'] = indicators.compute('EMA', talib.EMA, 'Close', timeperiod=30)
+            df['RSI'] = indicators.compute('RSI', talib.RSI, 'Close', timeperiod=14)
+            df['MACD'], df['MACD_signal'], df['MACD_hist'] = indicators.compute('MACD', talib.MACD, 'Close', fastperiod=12, slowperiod=26, signalperiod=9)
+            df['BB_upper'], df['BB_middle'], df['BB_lower'] = indicators.compute('BBANDS', talib.BBANDS, 'Close', timeperiod=20)
+            df['ATR'] = indicators.compute('ATR', talib.ATR, 'High', 'Low', 'Close', timeperiod=14)
+            df['ADX'] = indicators.compute('ADX', talib.ADX, 'High', 'Low', 'Close', timeperiod=14)
+
+    def to_panel(self, fields=('Close',), dtype='float64', shared=False):
+        """
+        Packs the downloaded data into a dates x tickers PricePanel.
+
+        :param fields: Columns to include (e.g. ('Close', 'Volume')).
+        :param dtype: 'float32' or 'float64'.
+        :param shared: If True, place the panel in shared memory for zero-copy access from worker processes.
+        :return: A PricePanel.
+        """
+        panel = PricePanel.from_frames(self.data, fields=fields, dtype=dtype)
+        return panel.to_shared_memory() if shared else panel
 
     def plot_indicators(self):
         for ticker in self.tickers:
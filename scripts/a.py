@@ -1,55 +1,111 @@
 import pandas as pd
+import numpy as np
 import talib
 import pynance as pn
 import matplotlib.pyplot as plt
+from scripts.compactFrame import ColumnSink
+from scripts.indicatorCache import NULL_CACHE
+from scripts.instrumentation import NULL_PROFILER
+from scripts.pricePanel import PricePanel
+from scripts.screener import Screener
 
 class QuantitativeAnalysis:
-    def __init__(self, tickers):
+    def __init__(self, tickers, cache=NULL_CACHE, compact=False):
+        """
+        :param tickers: List of ticker symbols.
+        :param cache: Optional IndicatorCache so tickers whose history is unchanged skip talib.
+        :param compact: Store the indicator columns as float32.
+        """
         self.tickers = tickers
         self.data = {}
+        self.cache = cache
+        self.compact = compact
 
-    def fetch_data(self, start_date, end_date):
+    def fetch_data(self, start_date, end_date, profiler=NULL_PROFILER):
         for ticker in self.tickers:
-            df = pn.data.get(ticker, start=start_date, end=end_date)
+            with profiler.stage('fetch', ticker=ticker) as stage:
+                self._fetch_ticker(ticker, start_date, end_date)
+                stage.add_rows(self.data[ticker])
 
-            # Adjust column name as per available data
-            if 'Adj Close' in df.columns:
-                df['Adj_Close'] = df['Adj Close']
-            elif 'Close' in df.columns:
-                df['Adj_Close'] = df['Close']
-            else:
-                raise ValueError(f"No adjusted close price found for {ticker}")
+    def _fetch_ticker(self, ticker, start_date, end_date):
+        df = pn.data.get(ticker, start=start_date, end=end_date)
 
-            self.data[ticker] = df
+        # Adjust column name as per available data
+        if 'Adj Close' in df.columns:
+            df['Adj_Close'] = df['Adj Close']
+        elif 'Close' in df.columns:
+            df['Adj_Close'] = df['Close']
+        else:
+            raise ValueError(f"No adjusted close price found for {ticker}")
 
-    def calculate_technical_indicators(self):
+        self.data[ticker] = df
+
+    def calculate_technical_indicators(self, profiler=NULL_PROFILER):
         for ticker in self.tickers:
-            df = self.data[ticker]
+            with profiler.stage('indicators', ticker=ticker, rows=len(self.data[ticker])):
+                self._calculate_ticker_indicators(ticker)
 
-            df['SMA_20'] = talib.SMA(df['Adj_Close'], timeperiod=20)
-            df['SMA_50'] = talib.SMA(df['Adj_Close'], timeperiod=50)
+    def _calculate_ticker_indicators(self, ticker):
+        df = self.data[ticker]
+        indicators = self.cache.bind(ticker, df['Adj_Close'])
+        sink = ColumnSink(df, compact=self.compact)
 
-            df['Upper_BB'], df['Middle_BB'], df['Lower_BB'] = talib.BBANDS(df['Adj_Close'], timeperiod=20, nbdevup=2, nbdevdn=2, matype=0)
+        sink.assign('SMA_20', indicators.compute('SMA', talib.SMA, timeperiod=20))
+        sink.assign('SMA_50', indicators.compute('SMA', talib.SMA, timeperiod=50))
 
-            df['RSI'] = talib.RSI(df['Adj_Close'], timeperiod=14)
+        bands = indicators.compute('BBANDS', talib.BBANDS, timeperiod=20, nbdevup=2, nbdevdn=2, matype=0)
+        for name, values in zip(['Upper_BB', 'Middle_BB', 'Lower_BB'], bands):
+            sink.assign(name, values)
 
-            df['MACD'], df['MACD_Signal'], df['MACD_Hist'] = talib.MACD(df['Adj_Close'], fastperiod=12, slowperiod=26, signalperiod=9)
+        sink.assign('RSI', indicators.compute('RSI', talib.RSI, timeperiod=14))
 
-            self.data[ticker] = df
+        macd = indicators.compute('MACD', talib.MACD, fastperiod=12, slowperiod=26, signalperiod=9)
+        for name, values in zip(['MACD', 'MACD_Signal', 'MACD_Hist'], macd):
+            sink.assign(name, values)
+
+        self.data[ticker] = df
 
     def analyze(self):
-        analysis_summary = {}
-        
-        for ticker in self.tickers:
-            df = self.data[ticker]
-            analysis_summary[ticker] = {}
+        # Latest row of every ticker, compared column-wise instead of ticker by ticker
+        columns = ['Adj_Close', 'SMA_20', 'SMA_50', 'RSI', 'MACD', 'MACD_Signal', 'Upper_BB', 'Lower_BB']
+        latest = pd.DataFrame({ticker: self.data[ticker][columns].iloc[-1] for ticker in self.tickers}).T.astype(float)
+        summary = pd.DataFrame({
+            'SMA_Trend': latest['SMA_20'] > latest['SMA_50'],
+            'RSI': latest['RSI'],
+            'MACD_Trend': latest['MACD'] > latest['MACD_Signal'],
+            'Bollinger_Position': np.select(
+                [latest['Adj_Close'] > latest['Upper_BB'], latest['Adj_Close'] < latest['Lower_BB']],
+                ['Upper', 'Lower'], default='Middle'),
+        }, index=latest.index)
+
+        return summary.to_dict(orient='index')
+
+    def screen(self, rules=None, sentiment=None, **kwargs):
+        """
+        Ranks all tickers with vectorized screening rules over their latest bar.
+
+        Only the trailing bars each indicator needs are used, so calculate_technical_indicators()
+        does not have to run first.
+
+        :param rules: Rule names from scripts.screener.RULES or a dict of DataFrame.eval expressions.
+        :param sentiment: Optional Series of the latest sentiment score per ticker.
+        :return: A DataFrame of indicator values, rule results and a 'Score' column, best first.
+        """
+        prices = pd.DataFrame({ticker: self.data[ticker]['Adj_Close'] for ticker in self.tickers})
+        return Screener(prices, sentiment=sentiment).screen(rules, **kwargs)
 
-            analysis_summary[ticker]['SMA_Trend'] = df['SMA_20'][-1] > df['SMA_50'][-1]
-            analysis_summary[ticker]['RSI'] = df['RSI'][-1]
-            analysis_summary[ticker]['MACD_Trend'] = df['MACD'][-1] > df['MACD_Signal'][-1]
-            analysis_summary[ticker]['Bollinger_Position'] = 'Upper' if df['Adj_Close'][-1] > df['Upper_BB'][-1] else 'Lower' if df['Adj_Close'][-1] < df['Lower_BB'][-1] else 'Middle'
+    def to_panel(self, fields=('Adj_Close',), dtype='float64', shared=False):
+        """
+        Packs the per-ticker data into a dates x tickers PricePanel.
 
-        return analysis_summary
+        :param fields: Columns to include (e.g. ('Adj_Close', 'RSI')).
+        :param dtype: 'float32' or 'float64'.
+        :param shared: If True, place the panel in shared memory so worker processes can
+                       PricePanel.attach(panel.name) instead of receiving pickled DataFrames.
+        :return: A PricePanel.
+        """
+        panel = PricePanel.from_frames(self.data, fields=fields, dtype=dtype)
+        return panel.to_shared_memory() if shared else panel
 
     def plot_data(self):
         """
@@ -68,14 +124,17 @@ class QuantitativeAnalysis:
         plt.grid(True)
         plt.show()
 
-    def run(self, start_date, end_date):
-        self.fetch_data(start_date, end_date)
-        self.calculate_technical_indicators()
-        self.plot_data()
-        return self.analyze()
+    def run(self, start_date, end_date, profiler=NULL_PROFILER):
+        self.fetch_data(start_date, end_date, profiler=profiler)
+        self.calculate_technical_indicators(profiler=profiler)
+        with profiler.stage('plot'):
+            self.plot_data()
+        with profiler.stage('analyze', rows=len(self.tickers)):
+            return self.analyze()
 
 # Example usage
-tickers = ['AAPL', 'GOOGL', 'MSFT', 'AMZN', 'TSLA', 'NVDA','META']
-qa = QuantitativeAnalysis(tickers)
-summary = qa.run('2023-01-01', '2023-08-31')
-print(summary)
+if __name__ == '__main__':
+    tickers = ['AAPL', 'GOOGL', 'MSFT', 'AMZN', 'TSLA', 'NVDA','META']
+    qa = QuantitativeAnalysis(tickers)
+    summary = qa.run('2023-01-01', '2023-08-31')
+    print(summary)
@@ -0,0 +1,192 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from scripts.timestamps import parse_timestamps, session_dates
+
+STRATEGIES = ('long', 'short', 'long_short')
+
+_SIGNAL = None
+_RETURNS = None
+
+
+def _positions(signal, strategy, thresholds):
+    """
+    Raw -1/0/+1 positions for every threshold at once, shape (len(thresholds), dates, tickers).
+    """
+    signal = np.nan_to_num(signal)[None]
+    thresholds = np.asarray(thresholds, dtype=np.float64)[:, None, None]
+    long = (signal > thresholds).astype(np.float64)
+    short = (signal < -thresholds).astype(np.float64)
+    if strategy == 'long':
+        return long
+    if strategy == 'short':
+        return -short
+    if strategy == 'long_short':
+        return long - short
+    raise ValueError(f"Unknown strategy '{strategy}'; choose from {STRATEGIES}.")
+
+
+def _hold(positions, holding_period, lag):
+    """
+    Hold each day's position for `holding_period` days as overlapping sub-portfolios (the average
+    of the last `holding_period` raw positions), entered `lag` days after the signal.
+    """
+    if holding_period > 1:
+        cumulative = np.cumsum(positions, axis=1)
+        held = cumulative.copy()
+        held[:, holding_period:] -= cumulative[:, :-holding_period]
+        positions = held / holding_period
+    if lag:
+        positions = np.concatenate([np.zeros_like(positions[:, :lag]), positions[:, :-lag]], axis=1)
+    return positions
+
+
+def simulate(signal, returns, strategy='long_short', thresholds=(0.0,), holding_period=1, cost_bps=0.0,
+             lag=1, periods_per_year=252):
+    """
+    Simulate a sentiment-signal strategy for several thresholds at once without a per-bar loop.
+
+    Each day, tickers whose signal exceeds the threshold go long (and those below minus the
+    threshold go short). Positions are scaled to unit gross exposure, held for holding_period
+    days, and charged cost_bps on every unit of turnover.
+
+    :param signal: dates x tickers array of sentiment signal values.
+    :param returns: dates x tickers array of the matching simple returns.
+    :param strategy: 'long', 'short' or 'long_short'.
+    :param thresholds: Signal thresholds to evaluate together.
+    :param holding_period: Days a position is held.
+    :param cost_bps: Transaction cost in basis points per unit of turnover.
+    :param lag: Days between the signal and the trade (default 1, to avoid look-ahead).
+    :param periods_per_year: Used to annualize the Sharpe ratio.
+    :return: A dict of arrays: 'returns' and 'equity' (thresholds x dates), and 'turnover',
+             'sharpe', 'total_return' and 'max_drawdown' (one value per threshold).
+    """
+    signal = np.asarray(signal, dtype=np.float64)
+    returns = np.nan_to_num(np.asarray(returns, dtype=np.float64))
+    positions = _hold(_positions(signal, strategy, thresholds), holding_period, lag)
+
+    gross = np.abs(positions).sum(axis=2, keepdims=True)
+    weights = np.divide(positions, gross, out=np.zeros_like(positions), where=gross > 0)
+
+    previous = np.concatenate([np.zeros_like(weights[:, :1]), weights[:, :-1]], axis=1)
+    daily_turnover = np.abs(weights - previous).sum(axis=2)
+    strategy_returns = (weights * returns[None]).sum(axis=2) - daily_turnover * cost_bps / 1e4
+
+    equity = np.cumprod(1.0 + strategy_returns, axis=1)
+    running_max = np.maximum.accumulate(equity, axis=1)
+    std = strategy_returns.std(axis=1, ddof=1)
+    sharpe = np.divide(np.sqrt(periods_per_year) * strategy_returns.mean(axis=1), std,
+                       out=np.full(std.shape, np.nan), where=std > 0)
+    return {
+        'returns': strategy_returns,
+        'equity': equity,
+        'turnover': daily_turnover.mean(axis=1),
+        'sharpe': sharpe,
+        'total_return': equity[:, -1] - 1.0,
+        'max_drawdown': (equity / running_max - 1.0).min(axis=1),
+    }
+
+
+def _init_worker(signal, returns):
+    global _SIGNAL, _RETURNS
+    _SIGNAL, _RETURNS = signal, returns
+
+
+def _run_group(strategy, holding_period, cost_bps, thresholds, lag, keep_equity):
+    result = simulate(_SIGNAL, _RETURNS, strategy=strategy, thresholds=thresholds,
+                      holding_period=holding_period, cost_bps=cost_bps, lag=lag)
+    rows = []
+    for i, threshold in enumerate(thresholds):
+        rows.append({
+            'strategy': strategy, 'threshold': threshold, 'holding_period': holding_period, 'cost_bps': cost_bps,
+            'sharpe': result['sharpe'][i], 'turnover': result['turnover'][i],
+            'total_return': result['total_return'][i], 'max_drawdown': result['max_drawdown'][i],
+        })
+    return rows, (result['equity'] if keep_equity else None)
+
+
+class SentimentBacktester:
+    def __init__(self, signal, returns, lag=1):
+        """
+        Backtest sentiment-signal strategies over a dates x tickers panel.
+
+        :param signal: dates x tickers DataFrame of sentiment signals (e.g. daily mean sentiment_score).
+        :param returns: dates x tickers DataFrame of simple returns. Its dates are the trading
+                        calendar: the signal is aligned to them, and days without news have a NaN
+                        signal (no new position) but still earn the returns of positions held.
+        :param lag: Trading days between the signal and the trade (default is 1).
+        """
+        self.returns = returns.reindex(columns=signal.columns)
+        self.signal = signal.reindex(index=returns.index)
+        self.lag = lag
+
+    @staticmethod
+    def signal_from_news(news_data, date_column='date', stock_column='stock', score_column='sentiment_score'):
+        """
+        Build the dates x tickers signal matrix from a scored news frame such as the output of
+        SentimentAnalyzer.calculate_sentiment(): the mean score per stock and day.
+
+        :return: A DataFrame indexed by trading session date with one column per stock; news published
+                 after the close or on a weekend counts towards the next session.
+        """
+        if 'session_date' in news_data.columns:
+            dates = news_data['session_date']
+        else:
+            dates = session_dates(parse_timestamps(news_data[date_column]))
+        return news_data[score_column].groupby([dates, news_data[stock_column]]).mean().unstack()
+
+    def run(self, strategy='long_short', threshold=0.0, holding_period=1, cost_bps=0.0):
+        """
+        Run a single parameter combination.
+
+        :return: A dict with the 'equity' curve (a Series) and 'sharpe', 'turnover', 'total_return' and 'max_drawdown'.
+        """
+        result = simulate(self.signal.to_numpy(), self.returns.to_numpy(), strategy=strategy,
+                          thresholds=[threshold], holding_period=holding_period, cost_bps=cost_bps, lag=self.lag)
+        return {
+            'equity': pd.Series(result['equity'][0], index=self.signal.index, name='equity'),
+            'sharpe': result['sharpe'][0],
+            'turnover': result['turnover'][0],
+            'total_return': result['total_return'][0],
+            'max_drawdown': result['max_drawdown'][0],
+        }
+
+    def sweep(self, strategies=STRATEGIES, thresholds=(0.0, 0.05, 0.1, 0.2), holding_periods=(1, 5, 10),
+              cost_bps=(0.0, 5.0, 10.0), workers=None, keep_equity=False):
+        """
+        Evaluate every combination of the parameter grids.
+
+        All thresholds of a (strategy, holding period, cost) group are simulated in one vectorized
+        call; groups are spread across a process pool that receives the signal and returns once per worker.
+
+        :param workers: Number of worker processes (default is the CPU count; 1 runs in-process).
+        :param keep_equity: Also return the equity curves as a dates x combinations DataFrame.
+        :return: A DataFrame of metrics sorted by Sharpe ratio, or (metrics, equity_curves) if keep_equity.
+        """
+        signal = self.signal.to_numpy(dtype=np.float64)
+        returns = self.returns.to_numpy(dtype=np.float64)
+        thresholds = list(thresholds)
+        groups = list(itertools.product(strategies, holding_periods, cost_bps))
+        args = [(strategy, holding_period, cost, thresholds, self.lag, keep_equity)
+                for strategy, holding_period, cost in groups]
+
+        workers = min(workers or os.cpu_count() or 1, len(groups))
+        if workers <= 1:
+            _init_worker(signal, returns)
+            outputs = [_run_group(*arg) for arg in args]
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(signal, returns)) as executor:
+                outputs = list(executor.map(_run_group, *zip(*args)))
+
+        rows = [row for group_rows, _ in outputs for row in group_rows]
+        metrics = pd.DataFrame(rows).sort_values('sharpe', ascending=False, na_position='last')
+        if not keep_equity:
+            return metrics
+        curves = np.concatenate([equity for _, equity in outputs], axis=0)
+        columns = pd.MultiIndex.from_frame(pd.DataFrame(rows)[['strategy', 'threshold', 'holding_period', 'cost_bps']])
+        return metrics, pd.DataFrame(curves.T, index=self.signal.index, columns=columns)
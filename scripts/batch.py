@@ -0,0 +1,321 @@
+import argparse
+import json
+import os
+import socket
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from scripts.jsonEncoding import json_default, json_safe
+
+_NEWS_DATA = None
+
+
+def _run_correlation(ticker, start_date, end_date, cache_dir):
+    from scripts.Correlation import NewsStockCorrelation
+
+    news_data = _NEWS_DATA[_NEWS_DATA['stock'] == ticker] if _NEWS_DATA is not None else None
+    if news_data is None or news_data.empty:
+        raise ValueError(f"No news headlines found for {ticker}")
+    analysis = NewsStockCorrelation(ticker, news_data)
+    return analysis.build_pipeline(start_date, end_date, cache_dir=cache_dir).run()['correlate']
+
+
+def _run_indicators(ticker, start_date, end_date, cache_dir):
+    from scripts.a import QuantitativeAnalysis
+    from scripts.indicatorCache import NULL_CACHE, IndicatorCache
+
+    # Workers share the persistent indicator store, so unchanged histories skip talib
+    cache = IndicatorCache(os.path.join(cache_dir, 'indicators')) if cache_dir else NULL_CACHE
+    qa = QuantitativeAnalysis([ticker], cache=cache)
+    qa.fetch_data(start_date, end_date)
+    qa.calculate_technical_indicators()
+    return qa.analyze()[ticker]
+
+
+ANALYSES = {
+    'correlation': _run_correlation,
+    'indicators': _run_indicators,
+}
+
+
+def read_universe(path):
+    """
+    Read a ticker universe file with one ticker per line. Blank lines and '#' comments are ignored.
+
+    :param path: Path to the universe file.
+    :return: A list of unique tickers in file order.
+    """
+    tickers = []
+    with open(path) as f:
+        for line in f:
+            ticker = line.split('#', 1)[0].strip().upper()
+            if ticker and ticker not in tickers:
+                tickers.append(ticker)
+    return tickers
+
+
+def _write_json(path, payload):
+    tmp_path = f'{path}.{socket.gethostname()}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(json_safe(payload), f, default=json_default, indent=2, allow_nan=False)
+    os.replace(tmp_path, path)
+
+
+class ShardQueue:
+    def __init__(self, output_dir, num_shards, claim_timeout=3600):
+        """
+        A work queue of shards kept on a (possibly shared) filesystem.
+
+        A shard is claimed by atomically creating its claim file, and completed by atomically
+        writing its result file. Any number of processes on any number of hosts pointing at the
+        same output_dir cooperate through these files, and a restarted run skips completed shards.
+
+        :param output_dir: Directory holding claim and result files.
+        :param num_shards: Total number of shards.
+        :param claim_timeout: Seconds after which a claim that has not been refreshed is
+                              considered abandoned (e.g. its worker crashed) and may be taken over.
+                              Claims made on this host by a process that has exited are taken
+                              over immediately.
+        """
+        self.output_dir = output_dir
+        self.num_shards = num_shards
+        self.claim_timeout = claim_timeout
+        self.claim_dir = os.path.join(output_dir, 'claims')
+        os.makedirs(self.claim_dir, exist_ok=True)
+
+    def result_path(self, index):
+        return os.path.join(self.output_dir, f'shard-{index:05d}.json')
+
+    def claim_path(self, index):
+        return os.path.join(self.claim_dir, f'shard-{index:05d}.claim')
+
+    def is_complete(self, index):
+        return os.path.exists(self.result_path(index))
+
+    def _try_claim(self, index):
+        path = self.claim_path(index)
+        # Write the claim under a per-attempt name and link it into place: the link fails if the
+        # shard is already claimed, and a claim file is never visible half-written.
+        owner = f'{socket.gethostname()} {os.getpid()} {time.time()} {uuid.uuid4().hex}\n'
+        attempt_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        with open(attempt_path, 'w') as f:
+            f.write(owner)
+        try:
+            os.link(attempt_path, path)
+            return True
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(attempt_path)
+
+        current = self._read_claim(path)
+        if current is None:
+            return self._try_claim(index)
+        if not self._is_stale(path, current):
+            return False
+        # Move the stale claim aside; only one contender can win the rename. The claim may have
+        # been replaced or refreshed between the check and the rename, so check the moved file
+        # again and put it back if it turned out to be live.
+        moved_path = f'{path}.stale.{uuid.uuid4().hex}'
+        try:
+            os.rename(path, moved_path)
+        except FileNotFoundError:
+            return False
+        moved = self._read_claim(moved_path)
+        if moved != current or not self._is_stale(moved_path, moved):
+            try:
+                os.link(moved_path, path)
+            except FileExistsError:
+                pass
+            os.remove(moved_path)
+            return False
+        os.remove(moved_path)
+        return self._try_claim(index)
+
+    @staticmethod
+    def _read_claim(path):
+        try:
+            with open(path) as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _is_stale(self, path, claim):
+        """
+        A claim is stale if its worker ran on this host and is no longer alive, or if it has not
+        been refreshed for claim_timeout seconds.
+        """
+        fields = claim.split()
+        if len(fields) >= 2 and fields[0] == socket.gethostname() and fields[1].isdigit():
+            pid = int(fields[1])
+            try:
+                os.kill(pid, 0)
+            except ProcessLookupError:
+                return True
+            except PermissionError:
+                pass
+        try:
+            return time.time() - os.path.getmtime(path) >= self.claim_timeout
+        except FileNotFoundError:
+            return False
+
+    def claim_next(self):
+        """
+        Claim the next shard that is neither complete nor claimed by a live worker.
+
+        :return: The shard index, or None when no work is left.
+        """
+        for index in range(self.num_shards):
+            if self.is_complete(index):
+                continue
+            if not self._try_claim(index):
+                continue
+            if self.is_complete(index):
+                self.release(index)
+                continue
+            return index
+        return None
+
+    def heartbeat(self, index):
+        """
+        Refresh a claim so it is not taken over while its shard is still being processed.
+        """
+        try:
+            os.utime(self.claim_path(index))
+        except FileNotFoundError:
+            pass
+
+    def complete(self, index, results):
+        """
+        Write a shard's results and release its claim.
+        """
+        _write_json(self.result_path(index), results)
+        self.release(index)
+
+    def release(self, index):
+        """
+        Release a shard's claim.
+        """
+        try:
+            os.remove(self.claim_path(index))
+        except FileNotFoundError:
+            pass
+
+    def completed(self):
+        return [index for index in range(self.num_shards) if self.is_complete(index)]
+
+
+def _init_worker(news_path, tickers):
+    global _NEWS_DATA
+    if news_path is None:
+        return
+    news_data = pd.read_csv(news_path, usecols=['headline', 'date', 'stock'])
+    _NEWS_DATA = news_data[news_data['stock'].isin(tickers)].reset_index(drop=True)
+
+
+def _worker_loop(output_dir, shards, start_date, end_date, analyses, claim_timeout, cache_dir):
+    queue = ShardQueue(output_dir, len(shards), claim_timeout=claim_timeout)
+    processed = []
+    while True:
+        index = queue.claim_next()
+        if index is None:
+            return processed
+        results = {}
+        for ticker in shards[index]:
+            results[ticker] = {}
+            for name in analyses:
+                try:
+                    results[ticker][name] = {'ok': True, 'result': ANALYSES[name](ticker, start_date, end_date, cache_dir)}
+                except Exception as exc:
+                    results[ticker][name] = {'ok': False, 'error': f'{type(exc).__name__}: {exc}'}
+            queue.heartbeat(index)
+        queue.complete(index, {'shard': index, 'tickers': shards[index], 'results': results})
+        processed.append(index)
+
+
+def _check_manifest(output_dir, manifest):
+    path = os.path.join(output_dir, 'manifest.json')
+    if os.path.exists(path):
+        with open(path) as f:
+            existing = json.load(f)
+        if existing != manifest:
+            raise ValueError(f"{output_dir} holds results of a different run; use a new --output-dir.")
+    else:
+        _write_json(path, manifest)
+
+
+def run_batch(tickers, start_date, end_date, analyses, output_dir, news_path=None, shard_size=10,
+              workers=None, claim_timeout=3600, cache_dir=None):
+    """
+    Run the analyses for a ticker universe, sharded across a process pool.
+
+    Results are written to output_dir/shard-NNNNN.json as each shard finishes. Re-running the
+    same command resumes from the shards that are not complete yet, and running it on several
+    hosts against a shared output_dir splits the shards between them.
+
+    :param tickers: List of ticker symbols.
+    :param start_date: Start date in 'YYYY-MM-DD' format.
+    :param end_date: End date in 'YYYY-MM-DD' format.
+    :param analyses: Names of the analyses to run (keys of ANALYSES).
+    :param output_dir: Directory for the manifest, claims and per-shard results.
+    :param news_path: Path to the news CSV, required by the 'correlation' analysis.
+    :param shard_size: Number of tickers per shard.
+    :param workers: Number of worker processes (default is the CPU count).
+    :param claim_timeout: Seconds before an unrefreshed claim is considered abandoned.
+    :param cache_dir: Optional pipeline and indicator cache directory shared by the workers.
+    :return: A list with the indices of all completed shards.
+    """
+    unknown = [name for name in analyses if name not in ANALYSES]
+    if unknown:
+        raise ValueError(f"Unknown analyses {unknown}; choose from {sorted(ANALYSES)}.")
+    if 'correlation' in analyses and news_path is None:
+        raise ValueError("The 'correlation' analysis requires a news CSV.")
+
+    shards = [tickers[i:i + shard_size] for i in range(0, len(tickers), shard_size)]
+    os.makedirs(output_dir, exist_ok=True)
+    _check_manifest(output_dir, {
+        'tickers': tickers, 'start_date': start_date, 'end_date': end_date,
+        'analyses': list(analyses), 'shard_size': shard_size,
+    })
+
+    workers = min(workers or os.cpu_count() or 1, max(len(shards), 1))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(news_path, tickers)) as executor:
+        futures = [executor.submit(_worker_loop, output_dir, shards, start_date, end_date,
+                                   list(analyses), claim_timeout, cache_dir)
+                   for _ in range(workers)]
+        for future in futures:
+            future.result()
+    return ShardQueue(output_dir, len(shards), claim_timeout=claim_timeout).completed()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run news/stock analyses for a ticker universe in parallel shards.')
+    parser.add_argument('universe', help='File with one ticker per line.')
+    parser.add_argument('--start', required=True, help="Start date in 'YYYY-MM-DD' format.")
+    parser.add_argument('--end', required=True, help="End date in 'YYYY-MM-DD' format.")
+    parser.add_argument('--analyses', nargs='+', default=['correlation'], choices=sorted(ANALYSES),
+                        help='Analyses to run for every ticker.')
+    parser.add_argument('--news', help="News CSV with 'headline', 'date' and 'stock' columns.")
+    parser.add_argument('--output-dir', required=True, help='Directory for per-shard results (may be on a shared filesystem).')
+    parser.add_argument('--shard-size', type=int, default=10, help='Tickers per shard.')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes on this host.')
+    parser.add_argument('--claim-timeout', type=float, default=3600,
+                        help='Seconds before a shard claimed by an unresponsive worker is retried.')
+    parser.add_argument('--cache-dir', default=None, help='Pipeline and indicator cache directory shared by the workers.')
+    args = parser.parse_args(argv)
+
+    tickers = read_universe(args.universe)
+    completed = run_batch(tickers, args.start, args.end, args.analyses, args.output_dir,
+                          news_path=args.news, shard_size=args.shard_size, workers=args.workers,
+                          claim_timeout=args.claim_timeout, cache_dir=args.cache_dir)
+    total = (len(tickers) + args.shard_size - 1) // args.shard_size
+    print(f'{len(completed)}/{total} shards complete in {args.output_dir}')
+    return 0 if len(completed) == total else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
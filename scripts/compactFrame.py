@@ -0,0 +1,124 @@
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+
+def compact_values(values, categorical=False):
+    """
+    Downcast analysis output: float64 becomes float32, labels become categoricals.
+
+    :param values: Series, array or scalar.
+    :param categorical: Convert string labels to a pandas Categorical.
+    :return: The compacted values.
+    """
+    if categorical:
+        return values.astype('category') if isinstance(values, pd.Series) else pd.Categorical(values)
+    if isinstance(values, (pd.Series, np.ndarray)) and values.dtype == np.float64:
+        return values.astype(np.float32)
+    if isinstance(values, float):
+        return np.float32(values)
+    return values
+
+
+class ColumnSink:
+    def __init__(self, dataframe, compact=False, side_frame=False, memory_budget=None, spill_dir=None,
+                 protected=()):
+        """
+        Destination for the columns an analysis class derives from an input DataFrame.
+
+        :param dataframe: The input DataFrame.
+        :param compact: Store float outputs as float32 and labels as categoricals.
+        :param side_frame: Write outputs to a separate DataFrame sharing the input's index
+                           instead of adding columns to the input.
+        :param memory_budget: Optional maximum size in bytes of the output columns. When a new
+                              column would exceed it, intermediate columns and then the oldest
+                              outputs are spilled to spill_dir (or dropped if spill_dir is None).
+        :param spill_dir: Directory for spilled columns; column() reloads them on demand.
+        :param protected: Output columns that are never spilled or dropped.
+        """
+        self.dataframe = dataframe
+        self.compact = compact
+        self.output = pd.DataFrame(index=dataframe.index) if side_frame else dataframe
+        self.memory_budget = memory_budget
+        self.spill_dir = spill_dir
+        self.protected = set(protected)
+        self.written = []
+        self.intermediate = set()
+        self.spilled = {}
+        self.dropped = set()
+
+    def assign(self, name, values, categorical=False, intermediate=False):
+        """
+        Store an output column, compacting it and enforcing the memory budget.
+
+        :param name: Column name.
+        :param values: Column values (Series, array or scalar).
+        :param categorical: The values are labels (stored as category in compact mode).
+        :param intermediate: The column is only needed to compute others and is spilled first.
+        """
+        if self.compact:
+            values = compact_values(values, categorical=categorical)
+        self._discard_spill(name)
+        self.dropped.discard(name)
+        if name in self.written:
+            self.written.remove(name)
+        self.written.append(name)
+        if intermediate:
+            self.intermediate.add(name)
+        else:
+            self.intermediate.discard(name)
+        self.output[name] = values
+        self._enforce_budget(keep=name)
+
+    def usage(self):
+        """
+        :return: Bytes used by the output columns currently held in memory.
+        """
+        columns = [name for name in self.written if name in self.output.columns]
+        return int(self.output[columns].memory_usage(index=False, deep=True).sum()) if columns else 0
+
+    def _enforce_budget(self, keep):
+        if self.memory_budget is None:
+            return
+        while self.usage() > self.memory_budget:
+            candidates = [name for name in self.written
+                          if name in self.output.columns and name != keep and name not in self.protected]
+            if not candidates:
+                return
+            # Intermediate columns first, then the oldest outputs
+            candidates.sort(key=lambda name: name not in self.intermediate)
+            self._evict(candidates[0])
+
+    def _evict(self, name):
+        if self.spill_dir is not None:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            # mkstemp names are unique across sinks and processes sharing spill_dir
+            fd, path = tempfile.mkstemp(prefix='spill-', suffix='.pkl', dir=self.spill_dir)
+            with os.fdopen(fd, 'wb') as f:
+                self.output[name].to_pickle(f)
+            self.spilled[name] = path
+        else:
+            self.dropped.add(name)
+        del self.output[name]
+
+    def _discard_spill(self, name):
+        path = self.spilled.pop(name, None)
+        if path is not None:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def column(self, name):
+        """
+        Read an output column, reloading it from disk if it was spilled.
+        """
+        if name in self.output.columns:
+            return self.output[name]
+        if name in self.spilled:
+            return pd.read_pickle(self.spilled[name])
+        if name in self.dropped:
+            raise KeyError(f"Column '{name}' was dropped to stay within the memory budget; set spill_dir to keep it.")
+        return self.dataframe[name]
@@ -0,0 +1,155 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from scripts.timestamps import parse_timestamps, to_market_time
+
+_TOKEN_PATTERN = r'[a-z0-9]+'
+
+
+def tokenize(text):
+    """
+    Split a headline or query into the lowercase alphanumeric tokens used by the index.
+    """
+    return re.findall(_TOKEN_PATTERN, str(text).lower())
+
+
+class HeadlineIndex:
+    def __init__(self, vocabulary, offsets, deltas, stock_names, stock_codes, days):
+        """
+        Inverted index over news headlines. Use HeadlineIndex.build() or HeadlineIndex.load().
+
+        Each token maps to a posting list of the row ids (positions in the indexed DataFrame)
+        whose headline contains it. Posting lists are stored delta-encoded in one array, and
+        deflate-compressed on disk. Per-row stock codes and day numbers turn stock and date
+        filters into vectorized boolean masks over all rows.
+        """
+        self.vocabulary = {token: i for i, token in enumerate(vocabulary)}
+        self.offsets = offsets
+        self.deltas = deltas
+        self.stock_names = list(stock_names)
+        self._stock_lookup = {name: i for i, name in enumerate(self.stock_names)}
+        self.stock_codes = stock_codes
+        self.days = days
+        self.num_rows = len(stock_codes)
+
+    @classmethod
+    def build(cls, dataframe, headline_column='headline', stock_column='stock', date_column='date'):
+        """
+        Index a news DataFrame such as the one used by SentimentAnalyzer and TopicModeling.
+
+        :param dataframe: News DataFrame.
+        :param headline_column: Column with the headline text (default is 'headline').
+        :param stock_column: Column with the ticker symbol (default is 'stock').
+        :param date_column: Column with the publication date (default is 'date').
+        :return: A HeadlineIndex whose row ids are positions in dataframe (usable with .iloc).
+        """
+        tokens = dataframe[headline_column].astype(str).str.lower().str.findall(_TOKEN_PATTERN)
+        exploded = pd.Series(tokens.to_numpy()).explode().dropna()
+        rows = exploded.index.to_numpy(dtype=np.int64)
+        token_codes, vocabulary = pd.factorize(exploded, sort=True)
+
+        # Unique (token, row) pairs, sorted by token then row
+        num_rows = max(len(dataframe), 1)
+        pairs = np.unique(token_codes.astype(np.int64) * num_rows + rows)
+        pair_tokens = pairs // num_rows
+        pair_rows = pairs % num_rows
+        offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(pair_tokens, minlength=len(vocabulary)), out=offsets[1:])
+
+        # Delta-encode each posting list; every list starts with its absolute first row id
+        deltas = np.diff(pair_rows, prepend=0)
+        deltas[offsets[:-1]] = pair_rows[offsets[:-1]]
+        deltas = deltas.astype(np.uint32)
+
+        stock_codes, stock_names = pd.factorize(dataframe[stock_column].astype(str))
+        dates = to_market_time(parse_timestamps(dataframe[date_column]))
+        days = dates.dt.normalize().to_numpy(dtype='datetime64[D]')
+        days = np.where(np.isnat(days), np.iinfo(np.int32).min, days.astype(np.int64)).astype(np.int32)
+        return cls(list(vocabulary), offsets, deltas, list(stock_names), stock_codes.astype(np.int32), days)
+
+    def save(self, path):
+        """
+        Persist the index to a compressed .npz file.
+        """
+        tokens = sorted(self.vocabulary, key=self.vocabulary.get)
+        np.savez_compressed(path, vocabulary=np.array(tokens, dtype=str), offsets=self.offsets,
+                            deltas=self.deltas, stock_names=np.array(self.stock_names, dtype=str),
+                            stock_codes=self.stock_codes, days=self.days)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load an index written by save().
+        """
+        with np.load(path) as data:
+            return cls(data['vocabulary'].tolist(), data['offsets'], data['deltas'], data['stock_names'].tolist(),
+                       data['stock_codes'], data['days'])
+
+    def postings(self, token):
+        """
+        :param token: A single token (matched case-insensitively).
+        :return: Sorted array of the row ids whose headline contains the token.
+        """
+        code = self.vocabulary.get(token.lower())
+        if code is None:
+            return np.empty(0, dtype=np.int64)
+        start, end = self.offsets[code], self.offsets[code + 1]
+        return np.cumsum(self.deltas[start:end], dtype=np.int64)
+
+    def _term_mask(self, term):
+        # A multi-token term such as 'rate cut' matches headlines containing all of its tokens
+        mask = np.ones(self.num_rows, dtype=bool)
+        for token in tokenize(term):
+            token_mask = np.zeros(self.num_rows, dtype=bool)
+            token_mask[self.postings(token)] = True
+            mask &= token_mask
+        return mask
+
+    def search(self, all_of=(), any_of=(), none_of=(), stocks=None, start=None, end=None):
+        """
+        Answer a boolean keyword, ticker and date-range query.
+
+        :param all_of: Terms that must all appear.
+        :param any_of: Terms of which at least one must appear.
+        :param none_of: Terms that must not appear.
+        :param stocks: Optional ticker symbol or list of ticker symbols.
+        :param start: Optional first publication day (inclusive).
+        :param end: Optional last publication day (inclusive).
+        :return: Sorted array of matching row ids, ready for dataframe.iloc[...].
+        """
+        if isinstance(all_of, str):
+            all_of = [all_of]
+        if isinstance(any_of, str):
+            any_of = [any_of]
+        if isinstance(none_of, str):
+            none_of = [none_of]
+        if isinstance(stocks, str):
+            stocks = [stocks]
+
+        mask = np.ones(self.num_rows, dtype=bool)
+        for term in all_of:
+            mask &= self._term_mask(term)
+        if any_of:
+            any_mask = np.zeros(self.num_rows, dtype=bool)
+            for term in any_of:
+                any_mask |= self._term_mask(term)
+            mask &= any_mask
+        for term in none_of:
+            mask &= ~self._term_mask(term)
+        if stocks is not None:
+            codes = [self._stock_lookup[stock] for stock in stocks if stock in self._stock_lookup]
+            mask &= np.isin(self.stock_codes, np.array(codes, dtype=np.int32))
+        if start is not None:
+            mask &= self.days >= np.datetime64(pd.Timestamp(start).date(), 'D').astype(np.int64)
+        if end is not None:
+            mask &= self.days <= np.datetime64(pd.Timestamp(end).date(), 'D').astype(np.int64)
+        return np.flatnonzero(mask)
+
+    def select(self, dataframe, **query):
+        """
+        Return the rows of the indexed DataFrame matching a search() query, e.g. to pass
+        to SentimentAnalyzer or TopicModeling.
+        """
+        return dataframe.iloc[self.search(**query)]
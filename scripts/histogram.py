@@ -1,23 +1,110 @@
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
 class Histogram:
-    def __init__(self, dataframe, column_name,x_label,y_label='Frequency',title='' ):
+    def __init__(self, dataframe, column_name,x_label,y_label='Frequency',title='', bins=None, bin_range=None):
+        """
+        Counts and plots the values of one column.
+
+        Categorical values are counted with np.bincount on their factorized codes, numeric values
+        (when bins is given) with np.bincount on their bin numbers. Counts can be accumulated
+        chunk by chunk with update(), and only the reduced counts are handed to matplotlib.
+
+        :param dataframe: DataFrame to count, or None to start empty and feed chunks with update().
+        :param column_name: The column to count.
+        :param bins: Optional number of bins or array of bin edges for numeric columns.
+        :param bin_range: (min, max) used with an integer bins; required when counting in chunks,
+                          otherwise the first chunk's range would fix the edges.
+        """
         self.dataframe = dataframe
         self.column_name = column_name
         self.x_label=x_label
         self.y_label=y_label
         self.title=title
+        self.bins = bins
+        self.bin_range = bin_range
+        self.edges = None
+        self.categories = pd.Index([])
+        self.category_counts = np.zeros(0, dtype=np.int64)
+        if dataframe is not None:
+            self.update(dataframe)
+
+    @classmethod
+    def from_chunks(cls, chunks, column_name, x_label, **kwargs):
+        """
+        Build the counts from an iterable of DataFrame chunks, e.g. pd.read_csv(path, chunksize=100000).
+        """
+        histogram = cls(None, column_name, x_label, **kwargs)
+        for chunk in chunks:
+            histogram.update(chunk)
+        return histogram
+
+    def _bin_edges(self, values):
+        if self.edges is None:
+            if np.ndim(self.bins) == 0:
+                low, high = self.bin_range if self.bin_range is not None else (np.nanmin(values), np.nanmax(values))
+                self.edges = np.linspace(low, high, int(self.bins) + 1)
+            else:
+                self.edges = np.asarray(self.bins, dtype=np.float64)
+            self.category_counts = np.zeros(len(self.edges) - 1, dtype=np.int64)
+            self.categories = pd.IntervalIndex.from_breaks(self.edges, closed='left')
+        return self.edges
+
+    def update(self, chunk):
+        """
+        Add the values of a chunk (a DataFrame holding column_name, or a Series) to the counts.
+        """
+        if isinstance(chunk, pd.DataFrame):
+            if self.column_name not in chunk.columns:
+                raise ValueError(f"Column '{self.column_name}' does not exist in the DataFrame.")
+            chunk = chunk[self.column_name]
+
+        if self.bins is not None:
+            values = chunk.to_numpy(dtype=np.float64)
+            values = values[~np.isnan(values)]
+            edges = self._bin_edges(values)
+            # Values equal to the last edge belong to the last bin, as with np.histogram
+            bin_numbers = np.searchsorted(edges, values, side='right') - 1
+            bin_numbers[values == edges[-1]] = len(edges) - 2
+            inside = (bin_numbers >= 0) & (bin_numbers < len(edges) - 1)
+            self.category_counts += np.bincount(bin_numbers[inside], minlength=len(edges) - 1)
+            return
+
+        codes, uniques = pd.factorize(chunk)
+        chunk_counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        positions = self.categories.get_indexer(uniques)
+        new = positions < 0
+        if new.any():
+            positions[new] = np.arange(len(self.categories), len(self.categories) + new.sum())
+            self.categories = self.categories.append(pd.Index(uniques[new]))
+            self.category_counts = np.concatenate([self.category_counts, np.zeros(new.sum(), dtype=np.int64)])
+        self.category_counts[positions] += chunk_counts
+
+    def counts(self, top_n=None, other_label='Other'):
+        """
+        Get the reduced counts.
+
+        :param top_n: Keep the top_n most frequent categories and sum the rest into one
+                      other_label bucket. Ignored for numeric bins, which keep their order.
+        :param other_label: Label of the bucket collecting the remaining categories.
+        :return: A Series of counts, most frequent first for categorical columns.
+        """
+        counts = pd.Series(self.category_counts, index=self.categories, name='count')
+        if self.bins is not None:
+            return counts
+        counts = counts.sort_values(ascending=False, kind='stable')
+        if top_n is not None and len(counts) > top_n:
+            other = counts.iloc[top_n:].sum()
+            counts = pd.concat([counts.iloc[:top_n], pd.Series({other_label: other}, name='count')])
+        return counts
 
-    def plot_histogram(self,size=(200,50)):
-        # Check if the column exists in the DataFrame
-        if self.column_name not in self.dataframe.columns:
-            raise ValueError(f"Column '{self.column_name}' does not exist in the DataFrame.")
-        
-        # Plot histogram
-        self.dataframe[self.column_name].value_counts().plot(kind='bar')
+    def plot_histogram(self,size=(200,50), top_n=30, other_label='Other'):
+        # Plot histogram from the reduced counts; categories beyond the top_n most frequent are
+        # folded into one other_label bar (pass top_n=None to draw every category)
+        self.counts(top_n=top_n, other_label=other_label).plot(kind='bar')
         plt.xlabel(self.x_label)
         plt.ylabel(self.y_label)
         plt.title(self.title)
         plt.plot(size)
-        plt.show()
\ No newline at end of file
+        plt.show()
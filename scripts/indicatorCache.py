@@ -0,0 +1,142 @@
+import os
+import pickle
+from collections import OrderedDict
+
+from scripts.pipeline import fingerprint
+
+
+class IndicatorCache:
+    def __init__(self, cache_dir=None, max_entries=1024, enabled=True):
+        """
+        Memoizes indicator results keyed by (ticker, indicator, parameters, hash of the input series).
+
+        Results are kept in an in-memory LRU and, when cache_dir is given, in one pickle file per key
+        so they are reused across runs and by other processes sharing the directory. A ticker whose
+        history has not changed hashes to the same key and its indicators are read back instead of
+        recomputed; any change to the input data produces a new key.
+
+        :param cache_dir: Optional directory of the persistent store.
+        :param max_entries: Number of results kept in memory.
+        :param enabled: If False, compute() calls the indicator function directly and nothing is hashed.
+        """
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._memory = OrderedDict()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def bind(self, ticker, inputs):
+        """
+        Hash a ticker's input data once for several indicator calls.
+
+        :param ticker: Ticker symbol (or any label of the input series).
+        :param inputs: The input Series, or a DataFrame of the input columns.
+        :return: A BoundIndicators whose compute() reuses the input hash.
+        """
+        return BoundIndicators(self, ticker, inputs, fingerprint(inputs) if self.enabled else None)
+
+    def compute(self, ticker, indicator, func, inputs, columns=(), **params):
+        """
+        Return a memoized indicator result, computing and storing it on a miss.
+
+        :param ticker: Ticker symbol.
+        :param indicator: Indicator name, e.g. 'SMA'.
+        :param func: Function computing the indicator, e.g. talib.SMA.
+        :param inputs: The input Series, or a DataFrame of the input columns.
+        :param columns: Columns of inputs passed to func in order (default is inputs itself).
+        :param params: Keyword arguments of func; part of the key.
+        """
+        return self.bind(ticker, inputs).compute(indicator, func, *columns, **params)
+
+    def _key(self, ticker, indicator, params, digest):
+        return fingerprint([ticker, indicator, params, digest])
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f'{key[:40]}.pkl')
+
+    def _get(self, key):
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return True, self._memory[key]
+        if self.cache_dir is not None and os.path.exists(self._path(key)):
+            with open(self._path(key), 'rb') as f:
+                value = pickle.load(f)
+            self.disk_hits += 1
+            self._remember(key, value)
+            return True, value
+        self.misses += 1
+        return False, None
+
+    def _put(self, key, value):
+        self._remember(key, value)
+        if self.cache_dir is None:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def hit_rate(self):
+        """
+        :return: Fraction of lookups answered from memory or disk (NaN before the first lookup).
+        """
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return (self.memory_hits + self.disk_hits) / lookups if lookups else float('nan')
+
+    def stats(self):
+        return {
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate(),
+            'entries_in_memory': len(self._memory),
+        }
+
+    def clear(self):
+        """
+        Empty the in-memory LRU; the persistent store is left untouched.
+        """
+        self._memory.clear()
+
+
+class BoundIndicators:
+    def __init__(self, cache, ticker, inputs, digest):
+        self.cache = cache
+        self.ticker = ticker
+        self.inputs = inputs
+        self.digest = digest
+
+    def compute(self, indicator, func, *columns, **params):
+        """
+        :param indicator: Indicator name, e.g. 'SMA'.
+        :param func: Function computing the indicator, e.g. talib.SMA.
+        :param columns: Columns of the bound DataFrame passed to func in order (default is the bound input).
+        :param params: Keyword arguments of func; part of the key.
+        :return: The result of func, from the cache when possible.
+        """
+        args = [self.inputs[column] for column in columns] if columns else [self.inputs]
+        if not self.cache.enabled:
+            return func(*args, **params)
+        key = self.cache._key(self.ticker, indicator, [list(columns), params], self.digest)
+        hit, value = self.cache._get(key)
+        if not hit:
+            value = func(*args, **params)
+            self.cache._put(key, value)
+        return value
+
+
+NULL_CACHE = IndicatorCache(enabled=False)
@@ -0,0 +1,259 @@
+import inspect
+import json
+import threading
+import time
+import tracemalloc
+from functools import wraps
+
+
+class _NullStage:
+    """
+    Stage handle returned when profiling is disabled. Every method is a no-op so the
+    instrumented code does not need to branch on whether a profiler is active.
+    """
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def add_rows(self, rows):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+# Memory tracking is shared by all profilers: tracing started for their stages is stopped again
+# when the last of them exits, so the rest of the process does not keep paying for it.
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_tracing_started = False
+
+
+def _acquire_tracing():
+    global _tracing_users, _tracing_started
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing_started = True
+        _tracing_users += 1
+
+
+def _release_tracing():
+    global _tracing_users, _tracing_started
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and _tracing_started:
+            tracemalloc.stop()
+            _tracing_started = False
+
+
+class _Stage:
+    """
+    Stage handle that measures one execution of a pipeline stage.
+    """
+    def __init__(self, profiler, name, ticker, rows):
+        self.profiler = profiler
+        self.name = name
+        self.ticker = ticker
+        self.rows = rows or 0
+
+    def add_rows(self, rows):
+        """
+        Add to the number of rows processed by this stage.
+
+        :param rows: Row count (an int, or anything with a length such as a DataFrame).
+        """
+        self.rows += rows if isinstance(rows, int) else len(rows)
+
+    def __enter__(self):
+        if self.profiler.track_memory:
+            self.profiler._enter_memory(self)
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self._wall
+        cpu = time.process_time() - self._cpu
+        peak = self.profiler._exit_memory(self) if self.profiler.track_memory else None
+        self.profiler._record(self.name, self.ticker, wall, cpu, self.rows, peak, exc_type is None)
+        return False
+
+
+class PipelineProfiler:
+    def __init__(self, enabled=True, track_memory=False):
+        """
+        Collects wall time, CPU time, rows processed and peak memory for each pipeline stage.
+
+        :param enabled: When False, stage() and profile() are no-ops and nothing is recorded.
+        :param track_memory: Trace Python allocations with tracemalloc to report each stage's peak
+                             memory above what was allocated when it started. This slows
+                             allocation-heavy code, so it is off by default. tracemalloc is
+                             process-wide, so stages running concurrently in other threads
+                             inflate each other's peaks; only sequential and nested stages are exact.
+                             Tracing is stopped again when the last stage exits, unless it was
+                             already running before.
+        """
+        self.enabled = enabled
+        self.track_memory = track_memory
+        self.records = []
+        self._lock = threading.Lock()
+        self._memory_lock = threading.Lock()
+        self._active = []
+
+    def _fold_peak(self):
+        # Credit the peak since the last reset to every open stage before it is reset again
+        peak = tracemalloc.get_traced_memory()[1]
+        for stage in self._active:
+            stage._peak = max(stage._peak, peak)
+
+    def _enter_memory(self, stage):
+        _acquire_tracing()
+        with self._memory_lock:
+            self._fold_peak()
+            tracemalloc.reset_peak()
+            stage._start_memory = stage._peak = tracemalloc.get_traced_memory()[0]
+            self._active.append(stage)
+
+    def _exit_memory(self, stage):
+        with self._memory_lock:
+            self._fold_peak()
+            self._active.remove(stage)
+        _release_tracing()
+        return stage._peak - stage._start_memory
+
+    def stage(self, name, ticker=None, rows=None):
+        """
+        Context manager measuring one stage.
+
+        :param name: Stage name (e.g. 'fetch', 'sentiment', 'merge', 'plot').
+        :param ticker: Optional ticker the stage is running for.
+        :param rows: Optional number of rows processed; can also be added with add_rows().
+        :return: A stage handle usable in a with-statement.
+        """
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name, ticker, rows)
+
+    def profile(self, name=None):
+        """
+        Decorator measuring every call of the decorated function as a stage.
+
+        The function's 'ticker' argument, passed by position or keyword, labels the stage.
+
+        :param name: Stage name (default is the function name).
+        """
+        def decorator(func):
+            stage_name = name or func.__name__
+            signature = inspect.signature(func)
+            takes_ticker = 'ticker' in signature.parameters
+
+            def ticker_of(args, kwargs):
+                if not takes_ticker:
+                    return kwargs.get('ticker')
+                try:
+                    return signature.bind_partial(*args, **kwargs).arguments.get('ticker')
+                except TypeError:
+                    # Invalid arguments; the call itself raises
+                    return None
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self.stage(stage_name, ticker=ticker_of(args, kwargs)):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def _record(self, name, ticker, wall, cpu, rows, peak, ok):
+        with self._lock:
+            self.records.append({
+                'stage': name,
+                'ticker': ticker,
+                'wall_seconds': wall,
+                'cpu_seconds': cpu,
+                'rows': rows,
+                'peak_memory_bytes': peak,
+                'ok': ok,
+            })
+
+    def reset(self):
+        """
+        Discard all recorded measurements.
+        """
+        with self._lock:
+            self.records = []
+
+    def summary(self):
+        """
+        Aggregate the recorded measurements per (stage, ticker).
+
+        :return: A list of dicts with call count and totals for each (stage, ticker).
+        """
+        totals = {}
+        with self._lock:
+            records = list(self.records)
+        for record in records:
+            key = (record['stage'], record['ticker'])
+            entry = totals.setdefault(key, {
+                'stage': record['stage'], 'ticker': record['ticker'], 'calls': 0, 'errors': 0,
+                'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'rows': 0, 'peak_memory_bytes': None,
+            })
+            entry['calls'] += 1
+            entry['errors'] += 0 if record['ok'] else 1
+            entry['wall_seconds'] += record['wall_seconds']
+            entry['cpu_seconds'] += record['cpu_seconds']
+            entry['rows'] += record['rows']
+            if record['peak_memory_bytes'] is not None:
+                entry['peak_memory_bytes'] = max(entry['peak_memory_bytes'] or 0, record['peak_memory_bytes'])
+        return list(totals.values())
+
+    def to_json(self, indent=None):
+        """
+        Export the recorded measurements and their per-stage summary as JSON.
+
+        :param indent: Indentation passed to json.dumps.
+        :return: A JSON string.
+        """
+        with self._lock:
+            records = list(self.records)
+        return json.dumps({'records': records, 'summary': self.summary()}, indent=indent)
+
+    def to_prometheus(self, prefix='pipeline_stage'):
+        """
+        Export the per-stage summary in the Prometheus text exposition format.
+
+        :param prefix: Metric name prefix.
+        :return: A string ready to be served on a /metrics endpoint or written to a textfile collector.
+        """
+        metrics = [
+            ('calls_total', 'counter', 'Number of stage executions.', 'calls'),
+            ('errors_total', 'counter', 'Number of stage executions that raised.', 'errors'),
+            ('wall_seconds_total', 'counter', 'Wall-clock time spent in the stage.', 'wall_seconds'),
+            ('cpu_seconds_total', 'counter', 'CPU time spent in the stage.', 'cpu_seconds'),
+            ('rows_total', 'counter', 'Rows processed by the stage.', 'rows'),
+            ('peak_memory_bytes', 'gauge', 'Peak traced Python memory during the stage.', 'peak_memory_bytes'),
+        ]
+        summary = self.summary()
+        lines = []
+        for suffix, kind, help_text, field in metrics:
+            name = f'{prefix}_{suffix}'
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for entry in summary:
+                if entry[field] is None:
+                    continue
+                labels = f'stage="{_escape_label(entry["stage"])}"'
+                if entry['ticker'] is not None:
+                    labels += f',ticker="{_escape_label(entry["ticker"])}"'
+                lines.append(f'{name}{{{labels}}} {entry[field]}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+NULL_PROFILER = PipelineProfiler(enabled=False)
@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+
+
+def json_default(value):
+    """
+    json.dump() fallback for values the json module cannot encode: NumPy scalars become Python
+    numbers, timestamps ISO-like strings and anything else its repr().
+    """
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return str(value)
+    return repr(value)
+
+
+def json_safe(value):
+    """
+    Prepare a result for json.dump(..., allow_nan=False): NaN and infinities inside dicts, lists
+    and tuples become None, so missing values are written as null instead of the non-standard NaN token.
+    """
+    if isinstance(value, dict):
+        return {key: json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [json_safe(item) for item in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    return value
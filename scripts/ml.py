@@ -3,6 +3,8 @@ import numpy as np
 import pynance as pn
 from textblob import TextBlob
 import matplotlib.pyplot as plt
+from scripts.priceResolution import PricePyramid
+from scripts.timestamps import parse_timestamps, to_market_time
 
 class MultiTickerNewsStockCorrelation:
     def __init__(self, tickers, news_data_dict):
@@ -18,6 +20,7 @@ class MultiTickerNewsStockCorrelation:
         self.stock_data_dict = {}
         self.weekly_sentiment_scores_dict = {}
         self.weekly_stock_data_dict = {}
+        self.price_pyramids = {}
 
     def fetch_stock_data(self, start_date, end_date):
         """
@@ -28,14 +31,10 @@ class MultiTickerNewsStockCorrelation:
         """
         for ticker in self.tickers:
             stock_data = pn.data.get(ticker, start=start_date, end=end_date)
-            if 'Adj Close' in stock_data.columns:
-                stock_data['Adj Close'] = stock_data['Adj Close'].pct_change()
-                # df['Adj_Close'] = df['Adj Close']
-            elif 'Close' in stock_data.columns:
-                stock_data['Adj Close'] = stock_data['Close'].pct_change()
-            weekly_stock_data = stock_data['Adj Close'].resample('W').last().pct_change()
             self.stock_data_dict[ticker] = stock_data
-            self.weekly_stock_data_dict[ticker] = weekly_stock_data
+            # Weekly returns compounded from the precomputed weekly bars
+            self.price_pyramids[ticker] = PricePyramid(stock_data)
+            self.weekly_stock_data_dict[ticker] = self.price_pyramids[ticker].returns('W')
 
     def analyze_sentiment(self):
         """
@@ -46,8 +45,8 @@ class MultiTickerNewsStockCorrelation:
                 return TextBlob(text).sentiment.polarity
 
             news_data['Sentiment'] = news_data['headline'].apply(get_sentiment)
-            news_data['Date'] = pd.to_datetime(news_data['date'])
-            news_data.set_index('date', inplace=True)
+            news_data['Date'] = to_market_time(parse_timestamps(news_data['date']))
+            news_data.set_index('Date', inplace=True)
             
             # Resample sentiment scores to weekly frequency by averaging
             weekly_sentiment_scores = news_data['Sentiment'].resample('W').mean()
@@ -94,71 +93,71 @@ class MultiTickerNewsStockCorrelation:
         self.plot_correlation()
 
 # Example usage:
+if __name__ == '__main__':
+    # Sample news data for each ticker
+    news_data_dict = {
+        'AAPL': pd.DataFrame({
+            'Date': ['2023-08-01', '2023-08-02', '2023-08-03'],
+            'Headline': [
+                'Apple releases strong quarterly earnings report',
+                'Apple stock surges on new product announcements',
+                'Investors worry about Apple’s supply chain issues'
+            ]
+        }),
+        'GOOGL': pd.DataFrame({
+            'Date': ['2023-08-01', '2023-08-02', '2023-08-03'],
+            'Headline': [
+                'Google faces antitrust scrutiny in Europe',
+                'Alphabet announces breakthrough in AI technology',
+                'Google to expand cloud services in Asia'
+            ]
+        }),
+        'MSFT': pd.DataFrame({
+            'Date': ['2023-08-01', '2023-08-02', '2023-08-03'],
+            'Headline': [
+                'Microsoft partners with OpenAI for new AI solutions',
+                'Microsoft reports record revenues in latest quarter',
+                'Microsoft to acquire gaming company in billion-dollar deal'
+            ]
+        }),
+        # Add similar data for 4 more tickers...
+        'AMZN': pd.DataFrame({
+            'Date': ['2023-08-01', '2023-08-02', '2023-08-03'],
+            'Headline': [
+                'Amazon expands into new markets with innovative strategies',
+                'Amazon faces challenges with supply chain disruptions',
+                'Amazon to introduce new product line next quarter'
+            ]
+        }),
+        'TSLA': pd.DataFrame({
+            'Date': ['2023-08-01', '2023-08-02', '2023-08-03'],
+            'Headline': [
+                'Tesla unveils new electric vehicle model',
+                'Tesla stock drops amid regulatory concerns',
+                'Elon Musk announces new Tesla factory location'
+            ]
+        }),
+        'NFLX': pd.DataFrame({
+            'Date': ['2023-08-01', '2023-08-02', '2023-08-03'],
+            'Headline': [
+                'Netflix releases highly anticipated new series',
+                'Netflix faces increased competition from streaming rivals',
+                'Netflix announces expansion into new markets'
+            ]
+        }),
+        'FB': pd.DataFrame({
+            'Date': ['2023-08-01', '2023-08-02', '2023-08-03'],
+            'Headline': [
+                'Facebook rebrands to focus on the metaverse',
+                'Facebook faces backlash over privacy issues',
+                'Meta (Facebook) announces new virtual reality products'
+            ]
+        })
+    }
 
-# Sample news data for each ticker
-news_data_dict = {
-    'AAPL': pd.DataFrame({
-        'Date': ['2023-08-01', '2023-08-02', '2023-08-03'],
-        'Headline': [
-            'Apple releases strong quarterly earnings report',
-            'Apple stock surges on new product announcements',
-            'Investors worry about Apple’s supply chain issues'
-        ]
-    }),
-    'GOOGL': pd.DataFrame({
-        'Date': ['2023-08-01', '2023-08-02', '2023-08-03'],
-        'Headline': [
-            'Google faces antitrust scrutiny in Europe',
-            'Alphabet announces breakthrough in AI technology',
-            'Google to expand cloud services in Asia'
-        ]
-    }),
-    'MSFT': pd.DataFrame({
-        'Date': ['2023-08-01', '2023-08-02', '2023-08-03'],
-        'Headline': [
-            'Microsoft partners with OpenAI for new AI solutions',
-            'Microsoft reports record revenues in latest quarter',
-            'Microsoft to acquire gaming company in billion-dollar deal'
-        ]
-    }),
-    # Add similar data for 4 more tickers...
-    'AMZN': pd.DataFrame({
-        'Date': ['2023-08-01', '2023-08-02', '2023-08-03'],
-        'Headline': [
-            'Amazon expands into new markets with innovative strategies',
-            'Amazon faces challenges with supply chain disruptions',
-            'Amazon to introduce new product line next quarter'
-        ]
-    }),
-    'TSLA': pd.DataFrame({
-        'Date': ['2023-08-01', '2023-08-02', '2023-08-03'],
-        'Headline': [
-            'Tesla unveils new electric vehicle model',
-            'Tesla stock drops amid regulatory concerns',
-            'Elon Musk announces new Tesla factory location'
-        ]
-    }),
-    'NFLX': pd.DataFrame({
-        'Date': ['2023-08-01', '2023-08-02', '2023-08-03'],
-        'Headline': [
-            'Netflix releases highly anticipated new series',
-            'Netflix faces increased competition from streaming rivals',
-            'Netflix announces expansion into new markets'
-        ]
-    }),
-    'FB': pd.DataFrame({
-        'Date': ['2023-08-01', '2023-08-02', '2023-08-03'],
-        'Headline': [
-            'Facebook rebrands to focus on the metaverse',
-            'Facebook faces backlash over privacy issues',
-            'Meta (Facebook) announces new virtual reality products'
-        ]
-    })
-}
+    # Initialize the correlation analysis class
+    tickers = ['AAPL', 'GOOGL', 'MSFT', 'AMZN', 'TSLA', 'NFLX', 'FB']
+    correlation_analysis = MultiTickerNewsStockCorrelation(tickers, news_data_dict)
 
-# Initialize the correlation analysis class
-tickers = ['AAPL', 'GOOGL', 'MSFT', 'AMZN', 'TSLA', 'NFLX', 'FB']
-correlation_analysis = MultiTickerNewsStockCorrelation(tickers, news_data_dict)
-
-# Run the analysis
-correlation_analysis.run_analysis('2023-07-01', '2023-08-31')
+    # Run the analysis
+    correlation_analysis.run_analysis('2023-07-01', '2023-08-31')
@@ -3,6 +3,27 @@ import numpy as np
 import pynance as pn
 from textblob import TextBlob
 import matplotlib.pyplot as plt
+from scripts.instrumentation import NULL_PROFILER
+from scripts.pipeline import Pipeline, Stage, is_settled
+from scripts.priceResolution import PricePyramid
+from scripts.timestamps import parse_timestamps, to_market_time
+
+def _fetch_prices(ticker, start_date, end_date):
+    return pn.data.get(ticker, start=start_date, end=end_date)
+
+def _resample_prices(pyramid, freq='W'):
+    # Compounded returns from the precomputed bars, rather than a change of daily returns
+    return pyramid.returns(freq)
+
+def _headline_sentiment(news_data):
+    def get_sentiment(text):
+        return TextBlob(text).sentiment.polarity
+
+    dates = to_market_time(parse_timestamps(news_data['date']))
+    return pd.Series(news_data['headline'].apply(get_sentiment).values, index=dates, name='Sentiment')
+
+def _resample_sentiment(sentiment, freq='W'):
+    return sentiment.resample(freq).mean()
 
 class MultiTickerNewsStockCorrelation:
     def __init__(self, tickers, news_data):
@@ -18,6 +39,7 @@ class MultiTickerNewsStockCorrelation:
         self.stock_data_dict = {}
         self.weekly_sentiment_scores = None
         self.weekly_stock_data_dict = {}
+        self.price_pyramids = {}
 
     def fetch_stock_data(self, start_date, end_date):
         """
@@ -27,15 +49,10 @@ class MultiTickerNewsStockCorrelation:
         :param end_date: End date for fetching data in 'YYYY-MM-DD' format.
         """
         for ticker in self.tickers:
-            stock_data = pn.data.get(ticker, start=start_date, end=end_date)
-            if 'Adj Close' in stock_data.columns:
-                stock_data['Adj Close'] = stock_data['Adj Close'].pct_change()
-                # df['Adj_Close'] = df['Adj Close']
-            elif 'Close' in stock_data.columns:
-                stock_data['Adj Close'] = stock_data['Close'].pct_change()
-            weekly_stock_data = stock_data['Adj Close'].resample('W').last().pct_change()
+            stock_data = _fetch_prices(ticker, start_date, end_date)
             self.stock_data_dict[ticker] = stock_data
-            self.weekly_stock_data_dict[ticker] = weekly_stock_data
+            self.price_pyramids[ticker] = PricePyramid(stock_data)
+            self.weekly_stock_data_dict[ticker] = _resample_prices(self.price_pyramids[ticker], 'W')
 
     def analyze_sentiment(self):
         """
@@ -45,7 +62,7 @@ class MultiTickerNewsStockCorrelation:
             return TextBlob(text).sentiment.polarity
 
         self.news_data['Sentiment'] = self.news_data['headline'].apply(get_sentiment)
-        self.news_data['Date'] = pd.to_datetime(self.news_data['date'], dayfirst=False, errors='coerce')
+        self.news_data['Date'] = to_market_time(parse_timestamps(self.news_data['date']))
         self.news_data.set_index('Date', inplace=True)
         # self.news_data['Date'] = pd.to_datetime(self.news_data['date'])
         # self.news_data.set_index('Date', inplace=True)
@@ -92,14 +109,65 @@ class MultiTickerNewsStockCorrelation:
         self.analyze_sentiment()
         self.plot_correlation()
 
-# Example usage:
+    def build_pipeline(self, start_date, end_date, freq='W', cache_dir=None, max_workers=4, profiler=NULL_PROFILER):
+        """
+        Builds the per-ticker fetch, sentiment scoring and resampling steps as declarative stages.
+
+        Every ticker's price fetch and the headline scoring are independent and run concurrently.
+        Resampling is a separate stage, so with a cache_dir changing freq only recomputes the
+        cheap 'resample:*' stages and reuses the fetched prices and scored headlines. Prices are
+        only cached for ranges ending before today, since later bars are still to come.
 
-# Load the news data from a CSV file
-news_data = pd.read_csv('./Data/raw_analyst_ratings.csv')
+        :param start_date: Start date for fetching data in 'YYYY-MM-DD' format.
+        :param end_date: End date for fetching data in 'YYYY-MM-DD' format.
+        :param freq: Resample frequency for prices and sentiment (default is 'W').
+        :param cache_dir: Directory for memoized stage outputs. If None, nothing is cached.
+        :param max_workers: Number of stages run at the same time.
+        :param profiler: Optional PipelineProfiler recording each executed stage.
+        :return: A Pipeline with 'fetch:<ticker>', 'pyramid:<ticker>', 'resample:<ticker>', 'sentiment' and 'resample:sentiment' stages.
+        """
+        pipeline = Pipeline(cache_dir=cache_dir, max_workers=max_workers, profiler=profiler)
+        for ticker in self.tickers:
+            pipeline.add(Stage(f'fetch:{ticker}', _fetch_prices,
+                               params={'ticker': ticker, 'start_date': start_date, 'end_date': end_date},
+                               cache=is_settled(end_date)))
+            pipeline.add(Stage(f'pyramid:{ticker}', PricePyramid, inputs=(f'fetch:{ticker}',)))
+            pipeline.add(Stage(f'resample:{ticker}', _resample_prices, inputs=(f'pyramid:{ticker}',),
+                               params={'freq': freq}))
+        pipeline.add(Stage('sentiment', _headline_sentiment,
+                           params={'news_data': self.news_data[['date', 'headline']]}))
+        pipeline.add(Stage('resample:sentiment', _resample_sentiment, inputs=('sentiment',),
+                           params={'freq': freq}))
+        return pipeline
+
+    def run_pipeline(self, start_date, end_date, freq='W', cache_dir='.pipeline_cache', plot=True, profiler=NULL_PROFILER):
+        """
+        Runs the analysis through the memoized pipeline instead of recomputing every step.
+
+        :param start_date: Start date for fetching data in 'YYYY-MM-DD' format.
+        :param end_date: End date for fetching data in 'YYYY-MM-DD' format.
+        :param freq: Resample frequency for prices and sentiment (default is 'W').
+        :param cache_dir: Directory for memoized stage outputs (default is '.pipeline_cache').
+        :param plot: Whether to plot the results.
+        :param profiler: Optional PipelineProfiler recording each executed stage.
+        """
+        outputs = self.build_pipeline(start_date, end_date, freq=freq, cache_dir=cache_dir, profiler=profiler).run()
+        for ticker in self.tickers:
+            self.stock_data_dict[ticker] = outputs[f'fetch:{ticker}']
+            self.price_pyramids[ticker] = outputs[f'pyramid:{ticker}']
+            self.weekly_stock_data_dict[ticker] = outputs[f'resample:{ticker}']
+        self.weekly_sentiment_scores = outputs['resample:sentiment']
+        if plot:
+            self.plot_correlation()
+
+# Example usage:
+if __name__ == '__main__':
+    # Load the news data from a CSV file
+    news_data = pd.read_csv('./Data/raw_analyst_ratings.csv')
 
-# Initialize the correlation analysis class
-tickers = ['AAPL', 'GOOGL', 'MSFT', 'AMZN', 'TSLA', 'NFLX', 'META']
-correlation_analysis = MultiTickerNewsStockCorrelation(tickers, news_data)
+    # Initialize the correlation analysis class
+    tickers = ['AAPL', 'GOOGL', 'MSFT', 'AMZN', 'TSLA', 'NFLX', 'META']
+    correlation_analysis = MultiTickerNewsStockCorrelation(tickers, news_data)
 
-# Run the analysis
-correlation_analysis.run_analysis('2023-07-01', '2023-08-31')
+    # Run the analysis
+    correlation_analysis.run_analysis('2023-07-01', '2023-08-31')
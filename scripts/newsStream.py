@@ -0,0 +1,318 @@
+import asyncio
+import bisect
+import inspect
+import json
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from scripts.timestamps import parse_timestamps, session_dates
+
+_STOP = object()
+
+
+class FileFeed:
+    def __init__(self, path, follow=False, poll_interval=0.5):
+        """
+        Headline feed reading JSON lines ({"headline": ..., "date": ..., "stock": ...}) from a local file.
+
+        :param path: Path to the JSON-lines file.
+        :param follow: Keep polling for appended lines (like tail -f) instead of stopping at end of file.
+        :param poll_interval: Seconds between polls when following.
+        """
+        self.path = path
+        self.follow = follow
+        self.poll_interval = poll_interval
+
+    async def __aiter__(self):
+        with open(self.path) as f:
+            while True:
+                line = f.readline()
+                if line:
+                    if line.strip():
+                        yield json.loads(line)
+                    continue
+                if not self.follow:
+                    return
+                await asyncio.sleep(self.poll_interval)
+
+
+class SocketFeed:
+    def __init__(self, host='127.0.0.1', port=8765):
+        """
+        Headline feed reading JSON lines from a TCP socket until the peer closes it.
+        """
+        self.host = host
+        self.port = port
+
+    async def __aiter__(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                if line.strip():
+                    yield json.loads(line)
+        finally:
+            writer.close()
+
+
+class LatencyHistogram:
+    # Upper bounds in seconds, as for a Prometheus histogram.
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float('inf'))
+
+    def __init__(self, buckets=BUCKETS):
+        """
+        Fixed-bucket histogram of end-to-end latencies.
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.total = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        """
+        :return: The upper bound of the bucket containing the q-quantile (e.g. 0.99).
+        """
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else None,
+            'p50': self.quantile(0.5),
+            'p99': self.quantile(0.99),
+            'max': self.max,
+            'buckets': dict(zip(map(str, self.buckets), self.counts)),
+        }
+
+
+def _score_with_sentiment_analyzer(batch):
+    from scripts.sentimentAnalyzer import SentimentAnalyzer
+
+    return SentimentAnalyzer(batch).calculate_sentiment()['sentiment_score'].to_numpy()
+
+
+class NewsIngestionService:
+    def __init__(self, feed, on_update=None, scorer=_score_with_sentiment_analyzer, batch_size=256,
+                 max_batch_delay=0.25, queue_size=10000, correlation_window=20, max_days=None):
+        """
+        Streams headlines from a feed, scores them in micro-batches and keeps per-(stock, day)
+        sentiment aggregates and rolling sentiment/return correlations up to date.
+
+        The queue between the feed and the scorer is bounded: when scoring falls behind, reading
+        from the feed pauses (backpressure) instead of buffering without limit. A batch is flushed
+        when it reaches batch_size or when its oldest headline has waited max_batch_delay seconds,
+        which bounds the time a headline spends before its update is published.
+
+        Only the latest max_days days of sentiment and returns are kept per stock; older days are
+        evicted, so memory and the cost of an update stay bounded however long the service runs.
+        Headlines for a day older than every retained day are counted in late_headlines and skipped.
+
+        :param feed: An async iterable of dicts with 'headline', 'date' and 'stock' keys (e.g. FileFeed, SocketFeed).
+        :param on_update: Optional callback (plain or async) receiving the list of updated (stock, day) records.
+        :param scorer: Callable mapping a DataFrame of headlines to an array of sentiment scores
+                       (default uses SentimentAnalyzer.calculate_sentiment).
+        :param batch_size: Maximum headlines scored together.
+        :param max_batch_delay: Maximum seconds a headline waits for its batch to fill.
+        :param queue_size: Maximum headlines buffered between the feed and the scorer.
+        :param correlation_window: Number of days in the rolling sentiment/return correlation.
+        :param max_days: Days retained per stock (default is twice correlation_window).
+        """
+        self.feed = feed
+        self.on_update = on_update
+        self.scorer = scorer
+        self.batch_size = batch_size
+        self.max_batch_delay = max_batch_delay
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.correlation_window = correlation_window
+        self.max_days = max_days or 2 * correlation_window
+
+        self.sentiment_sum = defaultdict(float)
+        self.sentiment_count = defaultdict(int)
+        # Sorted retained days per stock
+        self.stock_days = defaultdict(list)
+        self.return_days = defaultdict(list)
+        self.returns = {}
+        self.latest = {}
+        self.latency = LatencyHistogram()
+        self.batch_latency = LatencyHistogram()
+        self.processed = 0
+        self.blocked_puts = 0
+        self.late_headlines = 0
+
+    def _retain(self, days, day):
+        """
+        Insert a day into a stock's sorted list of retained days, keeping at most max_days.
+
+        :return: (kept, evicted): whether the day is retained, and the day dropped to make room (or None).
+        """
+        position = bisect.bisect_left(days, day)
+        if position < len(days) and days[position] == day:
+            return True, None
+        if position == 0 and len(days) >= self.max_days:
+            return False, None
+        days.insert(position, day)
+        if len(days) > self.max_days:
+            return True, days.pop(0)
+        return True, None
+
+    def update_return(self, stock, day, value):
+        """
+        Record the return of a stock for a day, so it enters the rolling correlation.
+        """
+        day = pd.Timestamp(day).normalize()
+        kept, evicted = self._retain(self.return_days[stock], day)
+        if kept:
+            self.returns[(stock, day)] = value
+        if evicted is not None:
+            del self.returns[(stock, evicted)]
+
+    def daily_sentiment(self, stock):
+        """
+        :return: A Series of the mean sentiment per retained day for a stock.
+        """
+        days = self.stock_days[stock]
+        return pd.Series([self.sentiment_sum[(stock, day)] / self.sentiment_count[(stock, day)] for day in days],
+                         index=pd.DatetimeIndex(days), dtype=float)
+
+    def rolling_correlation(self, stock):
+        """
+        Correlation between daily mean sentiment and return over the last correlation_window days
+        on which both are known.
+        """
+        days = [day for day in self.stock_days[stock] if (stock, day) in self.returns]
+        days = days[-self.correlation_window:]
+        if len(days) < 3:
+            return np.nan
+        x = np.array([self.sentiment_sum[(stock, day)] / self.sentiment_count[(stock, day)] for day in days])
+        y = np.array([self.returns[(stock, day)] for day in days])
+        if x.std() == 0 or y.std() == 0:
+            return np.nan
+        return float(np.corrcoef(x, y)[0, 1])
+
+    async def _produce(self):
+        loop = asyncio.get_running_loop()
+        try:
+            async for item in self.feed:
+                if self.queue.full():
+                    self.blocked_puts += 1
+                await self.queue.put((loop.time(), item))
+        finally:
+            await self.queue.put(_STOP)
+
+    async def _next_batch(self):
+        loop = asyncio.get_running_loop()
+        first = await self.queue.get()
+        if first is _STOP:
+            return None, True
+        batch = [first]
+        deadline = first[0] + self.max_batch_delay
+        while len(batch) < self.batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _consume(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch, done = await self._next_batch()
+            if batch:
+                started = loop.time()
+                frame = pd.DataFrame([item for _, item in batch])
+                scores = await loop.run_in_executor(None, self.scorer, frame)
+                updates = self._apply(frame, scores)
+                await self._publish(updates)
+                finished = loop.time()
+                self.batch_latency.observe(finished - started)
+                for received, _ in batch:
+                    self.latency.observe(finished - received)
+                self.processed += len(batch)
+            if done:
+                return
+
+    def _apply(self, frame, scores):
+        days = session_dates(parse_timestamps(frame['date']))
+        touched = set()
+        for stock, day, score in zip(frame['stock'], days, scores):
+            if pd.isna(day) or pd.isna(score):
+                continue
+            kept, evicted = self._retain(self.stock_days[stock], day)
+            if not kept:
+                self.late_headlines += 1
+                continue
+            if evicted is not None:
+                for aggregates in (self.sentiment_sum, self.sentiment_count, self.latest):
+                    aggregates.pop((stock, evicted), None)
+                touched.discard((stock, evicted))
+            self.sentiment_sum[(stock, day)] += float(score)
+            self.sentiment_count[(stock, day)] += 1
+            touched.add((stock, day))
+        updates = []
+        for stock, day in sorted(touched):
+            record = {
+                'stock': stock,
+                'date': day,
+                'mean_sentiment': self.sentiment_sum[(stock, day)] / self.sentiment_count[(stock, day)],
+                'count': self.sentiment_count[(stock, day)],
+                'rolling_correlation': self.rolling_correlation(stock),
+            }
+            self.latest[(stock, day)] = record
+            updates.append(record)
+        return updates
+
+    async def _publish(self, updates):
+        if self.on_update is None or not updates:
+            return
+        result = self.on_update(updates)
+        if inspect.isawaitable(result):
+            await result
+
+    async def run(self):
+        """
+        Consume the feed until it ends.
+
+        :return: A dict with the number of processed headlines and the latency summaries.
+        """
+        producer = asyncio.create_task(self._produce())
+        try:
+            await self._consume()
+            await producer
+        finally:
+            producer.cancel()
+        return self.stats()
+
+    def stats(self):
+        return {
+            'processed': self.processed,
+            'queue_depth': self.queue.qsize(),
+            'blocked_puts': self.blocked_puts,
+            'late_headlines': self.late_headlines,
+            'end_to_end_latency': self.latency.summary(),
+            'batch_latency': self.batch_latency.summary(),
+        }
@@ -0,0 +1,333 @@
+import hashlib
+import json
+import os
+import pickle
+import re
+import types
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+from scripts.instrumentation import NULL_PROFILER
+
+
+def fingerprint(value):
+    """
+    Compute a stable content hash of a stage parameter or input.
+
+    DataFrames, Series and NumPy arrays are hashed by content; other values are hashed
+    through their JSON representation, falling back to pickle for objects JSON cannot encode.
+
+    :param value: The value to hash.
+    :return: A hex digest string.
+    """
+    digest = hashlib.sha256()
+    _update_digest(digest, value)
+    return digest.hexdigest()
+
+
+def _update_digest(digest, value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        digest.update(type(value).__name__.encode())
+        if isinstance(value, pd.DataFrame):
+            digest.update(repr(list(value.columns)).encode())
+        digest.update(pd.util.hash_pandas_object(value, index=True).values.tobytes())
+    elif isinstance(value, np.ndarray):
+        digest.update(repr((value.dtype.str, value.shape)).encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        digest.update(b'{')
+        for key in sorted(value, key=repr):
+            _update_digest(digest, key)
+            _update_digest(digest, value[key])
+        digest.update(b'}')
+    elif isinstance(value, (list, tuple)):
+        digest.update(b'[')
+        for item in value:
+            _update_digest(digest, item)
+        digest.update(b']')
+    else:
+        try:
+            digest.update(json.dumps(value, sort_keys=True, default=str).encode())
+        except (TypeError, ValueError):
+            digest.update(pickle.dumps(value))
+
+
+def _const_repr(value):
+    # Nested functions appear as code objects whose repr holds a memory address, and frozenset
+    # order depends on string hashing; both would change the fingerprint in every process.
+    if isinstance(value, types.CodeType):
+        return _code_repr(value)
+    if isinstance(value, (tuple, list)):
+        return '(' + ','.join(_const_repr(item) for item in value) + ')'
+    if isinstance(value, (frozenset, set)):
+        return 'frozenset(' + ','.join(sorted(_const_repr(item) for item in value)) + ')'
+    if isinstance(value, dict):
+        return '{' + ','.join(f'{_const_repr(key)}:{_const_repr(item)}' for key, item in value.items()) + '}'
+    return repr(value)
+
+
+def _code_repr(code):
+    return f'code({code.co_code.hex()},{code.co_names!r},{_const_repr(code.co_consts)})'
+
+
+def _names(code):
+    # Global and attribute names used by a function, including those of its nested functions
+    names = list(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names.extend(_names(const))
+    return list(dict.fromkeys(names))
+
+
+def _is_plain(value):
+    if isinstance(value, (type(None), bool, int, float, str, bytes)):
+        return True
+    if isinstance(value, (tuple, list, frozenset, set)):
+        return all(_is_plain(item) for item in value)
+    if isinstance(value, dict):
+        return all(_is_plain(key) and _is_plain(item) for key, item in value.items())
+    return False
+
+
+def _package(obj):
+    return (getattr(obj, '__module__', None) or getattr(obj, '__name__', '')).split('.')[0]
+
+
+def _hash_callable(digest, obj, package, seen):
+    """
+    Hash a function or class together with the functions, classes and plain constants of the
+    same package that it references by global name (or as attributes of a module of the package),
+    so editing a helper a stage calls changes the stage's fingerprint.
+    """
+    obj = getattr(obj, '__func__', obj)
+    if id(obj) in seen:
+        return
+    seen.add(id(obj))
+
+    if isinstance(obj, type):
+        digest.update(f'class({obj.__qualname__})'.encode())
+        for base in obj.__bases__:
+            if _package(base) == package:
+                _hash_callable(digest, base, package, seen)
+        for name, value in sorted(vars(obj).items()):
+            value = value.fget if isinstance(value, property) else getattr(value, '__func__', value)
+            if isinstance(value, types.FunctionType):
+                digest.update(name.encode())
+                _hash_callable(digest, value, package, seen)
+            elif _is_plain(value) and not name.startswith('__'):
+                digest.update(f'{name}={_const_repr(value)}'.encode())
+        return
+
+    code = getattr(obj, '__code__', None)
+    if code is None:
+        digest.update(getattr(obj, '__qualname__', repr(obj)).encode())
+        return
+    digest.update(_code_repr(code).encode())
+    names = _names(code)
+    namespace = getattr(obj, '__globals__', {})
+    for name in names:
+        if name not in namespace:
+            continue
+        value = namespace[name]
+        if isinstance(value, types.ModuleType):
+            if _package(value) == package:
+                for attribute in names:
+                    member = getattr(value, attribute, None)
+                    if isinstance(member, (types.FunctionType, type)) and _package(member) == package:
+                        _hash_callable(digest, member, package, seen)
+        elif isinstance(value, (types.FunctionType, type)):
+            if _package(value) == package:
+                _hash_callable(digest, value, package, seen)
+        elif _is_plain(value):
+            digest.update(f'{name}={_const_repr(value)}'.encode())
+
+
+def _code_fingerprint(func):
+    """
+    Hash a function's (or class's methods') bytecode, names and constants, including those of
+    nested functions and of the same-package functions, classes and constants it references.
+    Code reached only through arguments or attributes of other objects is not seen, so stages
+    depending on it should pass an explicit version.
+    """
+    digest = hashlib.sha256()
+    target = getattr(func, '__func__', func)
+    package = _package(target)
+    _hash_callable(digest, target, package, set())
+    owner = getattr(func, '__self__', None)
+    if owner is not None and not isinstance(owner, types.ModuleType):
+        # Bound methods may call other methods through self
+        _hash_callable(digest, owner if isinstance(owner, type) else type(owner), package, set())
+    return digest.hexdigest()
+
+
+def is_settled(end_date):
+    """
+    :param end_date: Last date of a fetched range, or None for an open-ended range.
+    :return: Whether the range lies entirely in the past, so data fetched for it will not change
+             and a stage fetching it may be cached.
+    """
+    return end_date is not None and pd.Timestamp(end_date).normalize() < pd.Timestamp.today().normalize()
+
+
+class Stage:
+    def __init__(self, name, func, inputs=(), params=None, version=None, cache=True):
+        """
+        A single step of a Pipeline.
+
+        :param name: Unique stage name; other stages refer to it in their inputs.
+        :param func: Callable invoked as func(*input_outputs, **params). Its return value is the stage output.
+        :param inputs: Names of the stages whose outputs are passed positionally to func.
+        :param params: Keyword arguments passed to func. They are part of the stage fingerprint.
+        :param version: Optional version tag; bump it to invalidate cached outputs by hand.
+                        When omitted, the bytecode of the function and of the helpers it calls is used.
+        :param cache: Whether the output may be read from and written to the disk cache.
+        """
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.params = params or {}
+        self.version = version if version is not None else _code_fingerprint(func)
+        self.cache = cache
+
+
+class Pipeline:
+    def __init__(self, stages=(), cache_dir=None, max_workers=4, profiler=NULL_PROFILER):
+        """
+        Runs a graph of stages, reusing cached outputs when a stage's inputs and parameters are unchanged.
+
+        :param stages: Iterable of Stage objects.
+        :param cache_dir: Directory for memoized stage outputs. If None, nothing is cached.
+        :param max_workers: Number of threads used to run independent stages concurrently.
+        :param profiler: Optional PipelineProfiler recording each executed stage.
+        """
+        self.stages = {}
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.profiler = profiler
+        self.cache_hits = []
+        self.executed = []
+        for stage in stages:
+            self.add(stage)
+
+    def add(self, stage):
+        """
+        Add a stage to the pipeline.
+
+        :param stage: The Stage to add.
+        :return: The stage, for chaining.
+        """
+        if stage.name in self.stages:
+            raise ValueError(f"Duplicate stage name '{stage.name}'.")
+        self.stages[stage.name] = stage
+        return stage
+
+    def _required(self, targets):
+        required = set()
+        pending = list(targets)
+        while pending:
+            name = pending.pop()
+            if name in required:
+                continue
+            if name not in self.stages:
+                raise ValueError(f"Unknown stage '{name}'.")
+            required.add(name)
+            pending.extend(self.stages[name].inputs)
+        return required
+
+    def _fingerprints(self, required):
+        keys = {}
+        visiting = set()
+
+        def visit(name):
+            if name in keys:
+                return keys[name]
+            if name in visiting:
+                raise ValueError(f"Cycle detected at stage '{name}'.")
+            visiting.add(name)
+            stage = self.stages[name]
+            keys[name] = fingerprint({
+                'name': stage.name,
+                'version': stage.version,
+                'params': stage.params,
+                'inputs': [visit(upstream) for upstream in stage.inputs],
+            })
+            visiting.discard(name)
+            return keys[name]
+
+        for name in required:
+            visit(name)
+        return keys
+
+    def _cache_path(self, name, key):
+        safe_name = re.sub(r'[^A-Za-z0-9_.-]', '_', name)
+        return os.path.join(self.cache_dir, f'{safe_name}-{key[:32]}.pkl')
+
+    def _load(self, stage, key):
+        if self.cache_dir is None or not stage.cache:
+            return False, None
+        path = self._cache_path(stage.name, key)
+        if not os.path.exists(path):
+            return False, None
+        with open(path, 'rb') as f:
+            return True, pickle.load(f)
+
+    def _store(self, stage, key, value):
+        if self.cache_dir is None or not stage.cache:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._cache_path(stage.name, key)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def _execute(self, stage, key, args):
+        with self.profiler.stage(stage.name):
+            value = stage.func(*args, **stage.params)
+        self._store(stage, key, value)
+        return value
+
+    def run(self, targets=None):
+        """
+        Run the stages needed to produce the targets.
+
+        Stages whose fingerprint matches a cached output are not executed. Stages whose inputs
+        are all available are submitted to the thread pool together, so independent stages run
+        at the same time.
+
+        :param targets: Names of the stages to produce (default is every stage).
+        :return: A dict mapping each required stage name to its output.
+        """
+        targets = list(self.stages) if targets is None else list(targets)
+        required = self._required(targets)
+        keys = self._fingerprints(required)
+        self.cache_hits = []
+        self.executed = []
+
+        outputs = {}
+        remaining = set(required)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while remaining or running:
+                ready = [name for name in remaining
+                         if all(upstream in outputs for upstream in self.stages[name].inputs)]
+                for name in ready:
+                    remaining.discard(name)
+                    stage = self.stages[name]
+                    hit, value = self._load(stage, keys[name])
+                    if hit:
+                        outputs[name] = value
+                        self.cache_hits.append(name)
+                        continue
+                    args = [outputs[upstream] for upstream in stage.inputs]
+                    running[executor.submit(self._execute, stage, keys[name], args)] = name
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    outputs[name] = future.result()
+                    self.executed.append(name)
+        return outputs
@@ -0,0 +1,240 @@
+import json
+import struct
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+_MAGIC = b'PPANEL01'
+_PREFIX = struct.Struct('<8sQ')
+_ALIGN = 64
+
+
+def _data_offset(header_size):
+    offset = _PREFIX.size + header_size
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _attach_shared_memory(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 always registers the block with the resource tracker. Worker processes
+        # started by the panel's creator share its tracker, so this is a harmless duplicate.
+        return shared_memory.SharedMemory(name=name)
+
+
+class PricePanel:
+    def __init__(self, values, dates, tickers, fields, _buffer=None):
+        """
+        A dates x tickers price panel backed by one contiguous NumPy array.
+
+        The array has shape (len(fields), len(dates), len(tickers)), so every field is a
+        contiguous 2-D block and a date range of a field is a zero-copy view. The panel can be
+        placed in multiprocessing.shared_memory or a memory-mapped file, and worker processes
+        attach to it by name or path instead of receiving pickled DataFrames.
+
+        :param values: Array of shape (len(fields), len(dates), len(tickers)).
+        :param dates: Sorted DatetimeIndex (or anything convertible) of row labels.
+        :param tickers: List of ticker symbols (column labels).
+        :param fields: List of field names, e.g. ['Adj_Close', 'Volume'].
+        """
+        self.values = values
+        self.dates = pd.DatetimeIndex(dates)
+        self.tickers = list(tickers)
+        self.fields = list(fields)
+        self._ticker_index = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self._field_index = {field: i for i, field in enumerate(self.fields)}
+        self._buffer = _buffer
+        if values.shape != (len(self.fields), len(self.dates), len(self.tickers)):
+            raise ValueError(f"Panel values have shape {values.shape}, expected "
+                             f"{(len(self.fields), len(self.dates), len(self.tickers))}.")
+
+    @classmethod
+    def from_frames(cls, data, fields=('Adj_Close',), dtype=np.float64):
+        """
+        Build a panel from per-ticker DataFrames such as StockAnalyzer.data or QuantitativeAnalysis.data.
+
+        Dates are the union of all tickers' indexes; missing observations are NaN.
+
+        :param data: Dict mapping ticker to a DataFrame indexed by date.
+        :param fields: Columns to copy into the panel.
+        :param dtype: np.float32 or np.float64.
+        :return: A PricePanel in private (non-shared) memory.
+        """
+        tickers = list(data)
+        dates = pd.DatetimeIndex([])
+        for df in data.values():
+            dates = dates.union(pd.DatetimeIndex(df.index))
+        values = np.full((len(fields), len(dates), len(tickers)), np.nan, dtype=dtype)
+        for j, ticker in enumerate(tickers):
+            df = data[ticker]
+            rows = dates.get_indexer(pd.DatetimeIndex(df.index))
+            for f, field in enumerate(fields):
+                if field not in df.columns:
+                    raise ValueError(f"Column '{field}' does not exist for {ticker}.")
+                values[f, rows, j] = df[field].to_numpy(dtype=dtype)
+        return cls(values, dates, tickers, fields)
+
+    def _header(self):
+        return json.dumps({
+            'shape': list(self.values.shape),
+            'dtype': self.values.dtype.str,
+            'dates': np.asarray(self.dates.values, dtype='datetime64[ns]').view('int64').tolist(),
+            'tickers': self.tickers,
+            'fields': self.fields,
+        }).encode()
+
+    def _write(self, buf, header):
+        _PREFIX.pack_into(buf, 0, _MAGIC, len(header))
+        buf[_PREFIX.size:_PREFIX.size + len(header)] = np.frombuffer(header, dtype=np.uint8)
+        offset = _data_offset(len(header))
+        values = np.ndarray(self.values.shape, dtype=self.values.dtype, buffer=buf, offset=offset)
+        values[...] = self.values
+        return values
+
+    @classmethod
+    def _read(cls, buf, make_values):
+        magic, header_size = _PREFIX.unpack_from(buf, 0)
+        if magic != _MAGIC:
+            raise ValueError('Buffer does not hold a price panel.')
+        header = json.loads(bytes(buf[_PREFIX.size:_PREFIX.size + header_size]))
+        values = make_values(tuple(header['shape']), np.dtype(header['dtype']), _data_offset(header_size))
+        dates = pd.DatetimeIndex(np.asarray(header['dates'], dtype='int64').view('datetime64[ns]'))
+        return values, dates, header['tickers'], header['fields']
+
+    def to_shared_memory(self, name=None):
+        """
+        Copy the panel into a new shared-memory block.
+
+        The returned panel owns the block; call unlink() once all workers are done with it.
+
+        :param name: Optional block name. If None, a unique name is generated.
+        :return: A PricePanel backed by shared memory. Its name attribute is what workers pass to attach().
+        """
+        header = self._header()
+        shm = shared_memory.SharedMemory(name=name, create=True,
+                                         size=_data_offset(len(header)) + self.values.nbytes)
+        values = self._write(shm.buf, header)
+        return PricePanel(values, self.dates, self.tickers, self.fields, _buffer=shm)
+
+    @classmethod
+    def attach(cls, name):
+        """
+        Attach to a panel previously placed in shared memory, without copying its data.
+
+        :param name: The shared-memory block name.
+        :return: A read-only PricePanel view of the block.
+        """
+        shm = _attach_shared_memory(name)
+
+        def make_values(shape, dtype, offset):
+            values = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+            values.flags.writeable = False
+            return values
+
+        values, dates, tickers, fields = cls._read(shm.buf, make_values)
+        return cls(values, dates, tickers, fields, _buffer=shm)
+
+    def to_memmap(self, path):
+        """
+        Write the panel to a file that can be memory-mapped with open_memmap().
+
+        :param path: Destination file path.
+        """
+        header = self._header()
+        offset = _data_offset(len(header))
+        with open(path, 'wb') as f:
+            f.truncate(offset + self.values.nbytes)
+        mm = np.memmap(path, dtype=np.uint8, mode='r+')
+        self._write(mm, header)
+        mm.flush()
+        del mm
+
+    @classmethod
+    def open_memmap(cls, path, mode='r'):
+        """
+        Memory-map a panel file written by to_memmap(); pages are loaded lazily by the OS.
+
+        :param path: Panel file path.
+        :param mode: 'r' for read-only or 'r+' to allow in-place updates.
+        :return: A PricePanel backed by the file.
+        """
+        raw = np.memmap(path, dtype=np.uint8, mode='r')
+
+        def make_values(shape, dtype, offset):
+            return np.memmap(path, dtype=dtype, mode=mode, offset=offset, shape=shape)
+
+        values, dates, tickers, fields = cls._read(raw, make_values)
+        del raw
+        return cls(values, dates, tickers, fields)
+
+    @property
+    def name(self):
+        return self._buffer.name if isinstance(self._buffer, shared_memory.SharedMemory) else None
+
+    def ticker_column(self, ticker):
+        return self._ticker_index[ticker]
+
+    def date_row(self, date):
+        return self.dates.get_loc(pd.Timestamp(date))
+
+    def field(self, field):
+        """
+        :param field: Field name.
+        :return: The dates x tickers array of a field (a view, not a copy).
+        """
+        return self.values[self._field_index[field]]
+
+    def slice(self, field, tickers=None, start=None, end=None):
+        """
+        Read a block of the panel.
+
+        A date range is always a view. A single ticker (given as a string) is a strided view;
+        a list of tickers uses fancy indexing and therefore copies only the selected columns.
+
+        :param field: Field name.
+        :param tickers: A ticker, a list of tickers, or None for all.
+        :param start: First date (inclusive), or None.
+        :param end: Last date (inclusive), or None.
+        :return: A NumPy array.
+        """
+        rows = self.dates.slice_indexer(start, end)
+        block = self.field(field)[rows]
+        if tickers is None:
+            return block
+        if isinstance(tickers, str):
+            return block[:, self._ticker_index[tickers]]
+        return block[:, [self._ticker_index[ticker] for ticker in tickers]]
+
+    def frame(self, field, start=None, end=None):
+        """
+        :return: A dates x tickers DataFrame of a field, sharing memory with the panel where pandas allows it.
+        """
+        rows = self.dates.slice_indexer(start, end)
+        return pd.DataFrame(self.field(field)[rows], index=self.dates[rows], columns=self.tickers, copy=False)
+
+    def close(self):
+        """
+        Detach from the underlying shared memory. Views obtained from the panel must not be used afterwards.
+        """
+        if isinstance(self._buffer, shared_memory.SharedMemory):
+            self.values = None
+            self._buffer.close()
+            self._buffer = None
+
+    def unlink(self):
+        """
+        Close and destroy the shared-memory block. Only the process that created it should call this.
+        """
+        if isinstance(self._buffer, shared_memory.SharedMemory):
+            shm = self._buffer
+            self.close()
+            shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
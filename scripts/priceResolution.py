@@ -0,0 +1,132 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    pd.tseries.frequencies.to_offset('ME')
+    _MONTH_END = 'ME'
+except ValueError:
+    _MONTH_END = 'M'
+
+# Resolution label -> pandas resample rule. 'W' ends weeks on Sunday, like resample('W').
+RESOLUTIONS = {'W': 'W', 'M': _MONTH_END}
+
+_AGGREGATIONS = {
+    'Open': 'first',
+    'High': 'max',
+    'Low': 'min',
+    'Close': 'last',
+    'Adj Close': 'last',
+    'Volume': 'sum',
+}
+
+
+def _price_column(df):
+    if 'Adj Close' in df.columns:
+        return 'Adj Close'
+    if 'Close' in df.columns:
+        return 'Close'
+    raise ValueError("No adjusted close price found.")
+
+
+def _returns(prices, previous_close=np.nan):
+    previous = prices.shift(1)
+    if len(previous):
+        previous.iloc[0] = previous_close
+    return prices / previous - 1
+
+
+def _resample(daily, rule, previous_close=np.nan):
+    """
+    Aggregate daily bars to one resolution. Returns are compounded: each bar's return is its last
+    price over the previous bar's last price, which equals the product of its (1 + daily return).
+    """
+    columns = {column: how for column, how in _AGGREGATIONS.items() if column in daily.columns}
+    bars = daily.resample(rule).agg(columns).dropna(how='all', subset=[_price_column(daily)])
+    bars['Return'] = _returns(bars[_price_column(daily)], previous_close)
+    return bars
+
+
+class PricePyramid:
+    def __init__(self, daily, resolutions=('W', 'M')):
+        """
+        Daily OHLCV bars plus precomputed weekly and monthly bars with correctly compounded returns.
+
+        Coarser bars are built once per ticker; append() only rebuilds the bars touched by the new
+        daily rows, so weekly and monthly analyses read precomputed bars instead of resampling.
+
+        :param daily: DataFrame of daily bars indexed by date with 'Close' or 'Adj Close'
+                      (and optionally 'Open', 'High', 'Low', 'Volume').
+        :param resolutions: Coarser resolutions to maintain, from RESOLUTIONS.
+        """
+        self.resolutions = tuple(resolutions)
+        self.levels = {'D': self._daily(daily)}
+        for resolution in self.resolutions:
+            self.levels[resolution] = _resample(self.levels['D'], RESOLUTIONS[resolution])
+
+    @staticmethod
+    def _daily(daily):
+        daily = daily.sort_index()
+        daily = daily.loc[:, [column for column in _AGGREGATIONS if column in daily.columns]].copy()
+        daily['Return'] = _returns(daily[_price_column(daily)])
+        return daily
+
+    def bars(self, resolution='D'):
+        """
+        :param resolution: 'D', one of the maintained resolutions, or any other pandas resample rule
+                           (computed on the fly).
+        :return: DataFrame of bars with a compounded 'Return' column.
+        """
+        if resolution in self.levels:
+            return self.levels[resolution]
+        return _resample(self.levels['D'], RESOLUTIONS.get(resolution, resolution))
+
+    def returns(self, resolution='D'):
+        return self.bars(resolution)['Return']
+
+    def append(self, new_daily):
+        """
+        Add new daily bars. Rows with dates already present are replaced.
+
+        Only the coarser bars from the period containing the first new row onwards are rebuilt.
+        """
+        if new_daily.empty:
+            return
+        daily = self.levels['D']
+        new_daily = new_daily.loc[:, [column for column in daily.columns if column in new_daily.columns]]
+        first_new = new_daily.index.min()
+
+        # Rows before the first new one keep their values; later rows are merged and their returns rebuilt
+        kept_daily = daily[daily.index < first_new]
+        tail = daily[daily.index >= first_new].drop(columns='Return')
+        tail = pd.concat([tail[~tail.index.isin(new_daily.index)], new_daily]).sort_index()
+        previous_close = kept_daily[_price_column(kept_daily)].iloc[-1] if len(kept_daily) else np.nan
+        tail['Return'] = _returns(tail[_price_column(tail)], previous_close)
+        self.levels['D'] = pd.concat([kept_daily, tail])
+
+        for resolution in self.resolutions:
+            rule = RESOLUTIONS[resolution]
+            bars = self.levels[resolution]
+            # Label of the coarse bar containing the first new day
+            period_label = pd.Series(0, index=pd.DatetimeIndex([first_new])).resample(rule).sum().index[0]
+            kept = bars[bars.index < period_label]
+            daily_tail = self.levels['D'][self.levels['D'].index > (kept.index[-1] if len(kept) else pd.Timestamp.min)]
+            previous_close = kept[_price_column(kept)].iloc[-1] if len(kept) else np.nan
+            self.levels[resolution] = pd.concat([kept, _resample(daily_tail, rule, previous_close)])
+
+    def save(self, directory, ticker):
+        """
+        Store every level next to each other as <directory>/<ticker>.<resolution>.pkl.
+        """
+        os.makedirs(directory, exist_ok=True)
+        for resolution, bars in self.levels.items():
+            bars.to_pickle(os.path.join(directory, f'{ticker}.{resolution}.pkl'))
+
+    @classmethod
+    def load(cls, directory, ticker, resolutions=('W', 'M')):
+        pyramid = cls.__new__(cls)
+        pyramid.resolutions = tuple(resolutions)
+        pyramid.levels = {resolution: pd.read_pickle(os.path.join(directory, f'{ticker}.{resolution}.pkl'))
+                          for resolution in ('D',) + pyramid.resolutions}
+        return pyramid
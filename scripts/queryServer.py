@@ -0,0 +1,290 @@
+import argparse
+import json
+import os
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from scripts.Correlation import NewsStockCorrelation
+from scripts.a import QuantitativeAnalysis
+from scripts.backtester import SentimentBacktester
+from scripts.batch import read_universe
+from scripts.indicatorCache import NULL_CACHE, IndicatorCache
+from scripts.jsonEncoding import json_default, json_safe
+from scripts.newsStream import LatencyHistogram
+from scripts.pipeline import fingerprint
+from scripts.pricePanel import PricePanel
+from scripts.screener import Screener
+from scripts.sentimentAnalyzer import SentimentAnalyzer
+from scripts.timestamps import load_news, read_frame_cache, write_frame_cache
+
+
+def _load_scored_news(news_path, date_column='date', **read_csv_kwargs):
+    """
+    Load the news CSV with parsed timestamps and sentiment scores, scoring it only once.
+
+    The scored frame is saved next to the CSV as '<news_path>.scored.pkl' and reused while it is
+    newer than the CSV and was loaded with the same date_column and read_csv_kwargs.
+    """
+    scored_path = f'{news_path}.scored.pkl'
+    key = fingerprint(['scored', date_column, read_csv_kwargs])
+    news = read_frame_cache(scored_path, news_path, key)
+    if news is None:
+        news = load_news(news_path, date_column=date_column, **read_csv_kwargs)
+        news = SentimentAnalyzer(news, date_column=date_column, compact=True).calculate_sentiment()
+        write_frame_cache(scored_path, key, news)
+    return news
+
+
+def _records(frame):
+    # to_json turns NaN into null and timestamps into ISO strings
+    return json.loads(frame.to_json(orient='records', date_format='iso'))
+
+
+def _series(series):
+    return json.loads(series.to_json(orient='index', date_format='iso'))
+
+
+class AnalysisState:
+    def __init__(self, news, prices, cache=NULL_CACHE):
+        """
+        Everything the query server answers from, loaded once and then only read.
+
+        :param news: Scored news DataFrame with 'headline', 'publisher', 'date', 'stock',
+                     'session_date' and 'sentiment_score' columns (see _load_scored_news).
+        :param prices: Dict mapping ticker to a DataFrame with an 'Adj_Close' column, or a PricePanel.
+        :param cache: Optional IndicatorCache for the technical indicators.
+        """
+        if isinstance(prices, PricePanel):
+            frame = prices.frame('Adj_Close')
+            prices = {ticker: frame[[ticker]].set_axis(['Adj_Close'], axis=1).dropna() for ticker in frame.columns}
+        else:
+            frame = pd.DataFrame({ticker: data['Adj_Close'] for ticker, data in prices.items()})
+        self.news = news
+        self.sentiment = SentimentAnalyzer(news)
+        # Daily mean sentiment, trading sessions x stocks
+        self.daily_sentiment = SentimentBacktester.signal_from_news(news)
+        # Prices and sentiment do not change while serving, so the screening snapshot is computed once
+        latest_sentiment = self.daily_sentiment.ffill().iloc[-1] if len(self.daily_sentiment) else None
+        self.screener = Screener(frame, sentiment=latest_sentiment)
+        self._snapshot = self.screener.snapshot()
+        self.analysis = QuantitativeAnalysis(list(prices), cache=cache)
+        self.analysis.data = prices
+        self.analysis.calculate_technical_indicators()
+        self.summary = self.analysis.analyze()
+        self._news_rows = news.groupby('stock').indices
+        self._correlations = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, news_path, panel_path=None, tickers=None, start_date=None, end_date=None, cache_dir=None):
+        """
+        :param news_path: News CSV path.
+        :param panel_path: PricePanel file written by PricePanel.to_memmap(); if None, prices for
+                           tickers are fetched for start_date..end_date.
+        :param cache_dir: Optional persistent indicator cache directory.
+        """
+        news = _load_scored_news(news_path)
+        if panel_path is not None:
+            prices = PricePanel.open_memmap(panel_path)
+        else:
+            fetcher = QuantitativeAnalysis(tickers)
+            fetcher.fetch_data(start_date, end_date)
+            prices = fetcher.data
+        return cls(news, prices, cache=IndicatorCache(cache_dir) if cache_dir else NULL_CACHE)
+
+    def _ticker_data(self, ticker):
+        if ticker not in self.analysis.data:
+            raise KeyError(f"Unknown ticker '{ticker}'.")
+        return self.analysis.data[ticker]
+
+    def correlation_analysis(self, ticker):
+        """
+        :return: A NewsStockCorrelation for the ticker, built from the loaded prices and sentiment
+                 rollup instead of fetching and scoring again. Built once per ticker.
+        """
+        with self._lock:
+            if ticker not in self._correlations:
+                prices = self._ticker_data(ticker)
+                analysis = NewsStockCorrelation(ticker, self.news.iloc[self._news_rows.get(ticker, [])])
+                analysis.stock_data = prices.assign(Price_Change=prices['Adj_Close'].pct_change())
+                analysis.sentiment_scores = (self.daily_sentiment[ticker].dropna().rename('Sentiment')
+                                             if ticker in self.daily_sentiment.columns
+                                             else pd.Series(dtype=float, name='Sentiment'))
+                self._correlations[ticker] = analysis
+            return self._correlations[ticker]
+
+    def correlation(self, ticker, window=20, last=20):
+        analysis = self.correlation_analysis(ticker)
+        rolling = analysis.calculate_rolling_correlation(window=window)
+        correlation = analysis.calculate_correlation()
+        return {
+            'ticker': ticker,
+            'correlation': None if pd.isna(correlation) else float(correlation),
+            'rolling': _series(rolling.dropna().tail(last)),
+        }
+
+    def indicators(self, ticker, last=5):
+        return {'ticker': ticker, 'summary': self.summary.get(ticker),
+                'rows': _records(self._ticker_data(ticker).tail(last).rename_axis('date').reset_index())}
+
+    def screen(self, rules=None, require=None):
+        result = self.screener.screen(rules=rules, require=require, snapshot=self._snapshot)
+        return _records(result.rename_axis('ticker').reset_index())
+
+    def publishers(self, top_n=10):
+        return _records(self.sentiment.get_most_active_publishers(top_n))
+
+    def publication_trend(self, freq='D', last=30):
+        return _series(self.sentiment.aggregate_by(freq).tail(last))
+
+    def sentiment_series(self, ticker, start=None, end=None):
+        if ticker not in self.daily_sentiment.columns:
+            raise KeyError(f"No news for '{ticker}'.")
+        # Unparseable dates raise ValueError and are answered as bad requests
+        start = pd.Timestamp(start) if start is not None else None
+        end = pd.Timestamp(end) if end is not None else None
+        return _series(self.daily_sentiment[ticker].loc[start:end].dropna())
+
+
+class _QueryHandler(BaseHTTPRequestHandler):
+    ROUTES = {
+        '/correlation': lambda state, q: state.correlation(q['ticker'], window=int(q.get('window', 20)),
+                                                           last=int(q.get('last', 20))),
+        '/indicators': lambda state, q: state.indicators(q['ticker'], last=int(q.get('last', 5))),
+        '/screen': lambda state, q: state.screen(rules=q['rules'].split(',') if 'rules' in q else None,
+                                                 require=q['require'].split(',') if 'require' in q else None),
+        '/publishers': lambda state, q: state.publishers(top_n=int(q.get('top_n', 10))),
+        '/publication_trend': lambda state, q: state.publication_trend(freq=q.get('freq', 'D'),
+                                                                       last=int(q.get('last', 30))),
+        '/sentiment': lambda state, q: state.sentiment_series(q['ticker'], start=q.get('start'), end=q.get('end')),
+    }
+
+    def do_GET(self):
+        started = time.perf_counter()
+        try:
+            status, payload = self._answer()
+            try:
+                body = json.dumps(json_safe(payload), default=json_default, allow_nan=False).encode()
+            except (TypeError, ValueError) as error:
+                status, body = 500, json.dumps({'error': f'Could not encode the response: {error}'}).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            self.server.observe(time.perf_counter() - started)
+
+    def _answer(self):
+        url = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            if url.path == '/stats':
+                return 200, self.server.query_stats()
+            if url.path in self.ROUTES:
+                return 200, self.ROUTES[url.path](self.server.state, query)
+            return 404, {'error': f"Unknown endpoint '{url.path}'.", 'endpoints': sorted(self.ROUTES) + ['/stats']}
+        except KeyError as error:
+            return 404, {'error': str(error.args[0]) if error.args else 'Not found.'}
+        except ValueError as error:
+            return 400, {'error': str(error)}
+        except Exception as error:
+            # Keep the connection answered (and the latency recorded) whatever a query raises
+            return 500, {'error': f'{type(error).__name__}: {error}'}
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def address_string(self):
+        # Unix socket clients have no (host, port) address
+        return self.client_address[0] if self.client_address else 'unix'
+
+
+class _ServerMixin:
+    daemon_threads = True
+
+    def setup_state(self, state, verbose):
+        self.state = state
+        self.verbose = verbose
+        self.latency = LatencyHistogram()
+        self._stats_lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self._stats_lock:
+            self.latency.observe(seconds)
+
+    def query_stats(self):
+        with self._stats_lock:
+            stats = {'latency': self.latency.summary()}
+        stats['indicator_cache'] = self.state.analysis.cache.stats()
+        return stats
+
+
+class _HTTPServer(_ServerMixin, ThreadingHTTPServer):
+    pass
+
+
+class _UnixHTTPServer(_ServerMixin, socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    pass
+
+
+def make_server(state, host='127.0.0.1', port=8050, unix_socket=None, verbose=False):
+    """
+    Create a threaded JSON-over-HTTP server answering queries from an AnalysisState.
+
+    Each request runs in its own thread; the state is read-only once loaded, so readers run
+    concurrently. Endpoints (GET, parameters in the query string): /correlation?ticker=,
+    /indicators?ticker=, /screen?rules=&require=, /publishers?top_n=, /publication_trend?freq=,
+    /sentiment?ticker=&start=&end= and /stats.
+
+    :param unix_socket: Listen on this Unix socket path instead of host:port.
+    :return: The server; call serve_forever() on it.
+    """
+    if unix_socket is not None:
+        if os.path.exists(unix_socket):
+            os.remove(unix_socket)
+        server = _UnixHTTPServer(unix_socket, _QueryHandler)
+    else:
+        server = _HTTPServer((host, port), _QueryHandler)
+    server.setup_state(state, verbose)
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve correlation, indicator, screening and publisher queries from memory.')
+    parser.add_argument('--news', required=True, help="News CSV with 'headline', 'publisher', 'date' and 'stock' columns.")
+    parser.add_argument('--panel', help='PricePanel file written by PricePanel.to_memmap().')
+    parser.add_argument('--universe', help='File with one ticker per line; prices are fetched when --panel is not given.')
+    parser.add_argument('--start', help="Start date in 'YYYY-MM-DD' format.")
+    parser.add_argument('--end', help="End date in 'YYYY-MM-DD' format.")
+    parser.add_argument('--cache-dir', default=None, help='Persistent indicator cache directory.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8050)
+    parser.add_argument('--unix-socket', help='Listen on a Unix socket path instead of host:port.')
+    parser.add_argument('--verbose', action='store_true', help='Log every request.')
+    args = parser.parse_args(argv)
+    if args.panel is None and not (args.universe and args.start and args.end):
+        parser.error('either --panel or --universe, --start and --end are required')
+
+    tickers = read_universe(args.universe) if args.panel is None else None
+    state = AnalysisState.load(args.news, panel_path=args.panel, tickers=tickers, start_date=args.start,
+                               end_date=args.end, cache_dir=args.cache_dir)
+    server = make_server(state, host=args.host, port=args.port, unix_socket=args.unix_socket, verbose=args.verbose)
+    print(f'Serving on {args.unix_socket or f"http://{args.host}:{args.port}"}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
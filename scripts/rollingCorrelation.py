@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+
+
+def _correlation_from_sums(n, sx, sy, sxy, sxx, syy, min_periods):
+    safe_n = np.where(n > 0, n, 1)
+    cov = sxy - sx * sy / safe_n
+    var_x = sxx - sx * sx / safe_n
+    var_y = syy - sy * sy / safe_n
+    # Variances that are only rounding noise relative to the raw sums count as zero
+    valid = (n >= max(min_periods, 2)) & (var_x > 1e-12 * sxx) & (var_y > 1e-12 * syy)
+    out = np.full(np.shape(n), np.nan)
+    np.divide(cov, np.sqrt(np.abs(var_x * var_y)), out=out, where=valid)
+    return np.clip(out, -1.0, 1.0, out=out, where=valid)
+
+
+def rolling_correlation(x, y, window, min_periods=None):
+    """
+    Rolling Pearson correlation of two dates x tickers panels, for all tickers at once.
+
+    Windowed sums of x, y, xy, x^2 and y^2 come from differences of cumulative sums, so the
+    cost per date and ticker is constant whatever the window. Dates where either value is NaN
+    (e.g. days without news) are left out of the window's sums.
+
+    :param x: dates x tickers DataFrame (e.g. daily mean sentiment).
+    :param y: dates x tickers DataFrame with the same shape (e.g. daily returns).
+    :param window: Number of dates in each window.
+    :param min_periods: Minimum number of paired observations (default is window // 2).
+    :return: A dates x tickers DataFrame of correlations.
+    """
+    y = y.reindex(index=x.index, columns=x.columns)
+    xv = x.to_numpy(dtype=np.float64)
+    yv = y.to_numpy(dtype=np.float64)
+    valid = ~(np.isnan(xv) | np.isnan(yv))
+    # Centering each column keeps the cumulative sums small and the differences accurate. Means
+    # are taken over the paired observations; columns without any (e.g. no news) have no values
+    # left to center.
+    count = np.maximum(valid.sum(axis=0), 1)
+    xv = np.where(valid, xv, 0.0)
+    yv = np.where(valid, yv, 0.0)
+    xv = np.where(valid, xv - xv.sum(axis=0) / count, 0.0)
+    yv = np.where(valid, yv - yv.sum(axis=0) / count, 0.0)
+
+    def windowed(values):
+        cumulative = np.cumsum(values, axis=0)
+        out = cumulative.copy()
+        out[window:] -= cumulative[:-window]
+        return out
+
+    result = _correlation_from_sums(windowed(valid.astype(np.float64)), windowed(xv), windowed(yv),
+                                    windowed(xv * yv), windowed(xv * xv), windowed(yv * yv),
+                                    window // 2 if min_periods is None else min_periods)
+    return pd.DataFrame(result, index=x.index, columns=x.columns)
+
+
+class RollingCorrelation:
+    def __init__(self, tickers, window, min_periods=None):
+        """
+        Online rolling correlation per ticker, updated one date at a time.
+
+        Running sums of x, y, xy, x^2 and y^2 are kept per ticker together with a ring buffer of
+        the last `window` observations, so appending a date adds the new values and subtracts the
+        ones leaving the window in O(1) per ticker. The sums are recomputed exactly from the ring
+        buffer once per window to stop floating-point drift from accumulating.
+
+        :param tickers: List of ticker symbols (columns).
+        :param window: Number of dates in each window.
+        :param min_periods: Minimum number of paired observations (default is window // 2).
+        """
+        self.tickers = list(tickers)
+        self.window = window
+        self.min_periods = window // 2 if min_periods is None else min_periods
+        shape = (window, len(self.tickers))
+        self._x = np.zeros(shape)
+        self._y = np.zeros(shape)
+        self._valid = np.zeros(shape, dtype=bool)
+        self._position = 0
+        self._updates = 0
+        self._sums = np.zeros((6, len(self.tickers)))
+
+    def _recompute(self):
+        x = np.where(self._valid, self._x, 0.0)
+        y = np.where(self._valid, self._y, 0.0)
+        self._sums = np.stack([self._valid.sum(axis=0), x.sum(axis=0), y.sum(axis=0),
+                               (x * y).sum(axis=0), (x * x).sum(axis=0), (y * y).sum(axis=0)]).astype(np.float64)
+
+    def _terms(self, x, y, valid):
+        x = np.where(valid, x, 0.0)
+        y = np.where(valid, y, 0.0)
+        return np.stack([valid.astype(np.float64), x, y, x * y, x * x, y * y])
+
+    def update(self, x, y):
+        """
+        Append one date.
+
+        :param x: Array (or Series indexed by ticker) of today's x values; NaN means no observation.
+        :param y: Array (or Series indexed by ticker) of today's y values.
+        :return: Array of the current correlation per ticker.
+        """
+        if isinstance(x, pd.Series):
+            x = x.reindex(self.tickers)
+        if isinstance(y, pd.Series):
+            y = y.reindex(self.tickers)
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        valid = ~(np.isnan(x) | np.isnan(y))
+
+        slot = self._position
+        self._sums -= self._terms(self._x[slot], self._y[slot], self._valid[slot])
+        self._x[slot], self._y[slot], self._valid[slot] = x, y, valid
+        self._sums += self._terms(x, y, valid)
+        self._position = (slot + 1) % self.window
+        self._updates += 1
+        if self._updates % self.window == 0:
+            self._recompute()
+        return self.correlation()
+
+    def correlation(self):
+        """
+        :return: Array of the current correlation per ticker (NaN until min_periods paired observations).
+        """
+        return _correlation_from_sums(*self._sums, self.min_periods)
+
+    def run(self, x, y):
+        """
+        Feed two dates x tickers DataFrames through update(), e.g. to warm up on history before
+        appending new dates.
+
+        :return: A dates x tickers DataFrame of correlations.
+        """
+        x = x.reindex(columns=self.tickers)
+        y = y.reindex(index=x.index, columns=self.tickers)
+        rows = [self.update(x_row, y_row) for x_row, y_row in zip(x.to_numpy(), y.to_numpy())]
+        return pd.DataFrame(rows, index=x.index, columns=self.tickers)
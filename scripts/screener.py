@@ -0,0 +1,187 @@
+import numpy as np
+import pandas as pd
+
+from scripts.pricePanel import PricePanel
+
+# Built-in screening rules, written as DataFrame.eval expressions over the snapshot columns.
+RULES = {
+    'SMA_Trend': 'SMA_20 > SMA_50',
+    'MACD_Trend': 'MACD > MACD_Signal',
+    'RSI_Oversold': 'RSI < 30',
+    'RSI_Overbought': 'RSI > 70',
+    'Above_Upper_BB': 'Adj_Close > Upper_BB',
+    'Below_Lower_BB': 'Adj_Close < Lower_BB',
+    'Positive_Sentiment': 'Sentiment > 0.1',
+    'Negative_Sentiment': 'Sentiment < -0.1',
+}
+
+
+def _align_valid(values):
+    """
+    Move each column's valid values to the bottom, keeping their order, so every column holds its
+    own history without gaps (as if it were passed to talib on its own) and NaNs only lead.
+    """
+    order = np.argsort(~np.isnan(values), axis=0, kind='stable')
+    return np.take_along_axis(values, order, axis=0)
+
+
+def _trailing_valid(values, lookback):
+    """
+    Each column's last `lookback` valid values, in order and without gaps, as a lookback x columns
+    array with leading NaNs for shorter histories. Only a trailing window is aligned; it is widened
+    for the columns it holds too few valid values of (gaps, or a history ending early).
+    """
+    out = np.full((lookback, values.shape[1]), np.nan)
+    columns = np.arange(values.shape[1])
+    size = lookback
+    while len(columns):
+        window = values[-size:, columns]
+        aligned = _align_valid(window)[-lookback:]
+        done = (np.count_nonzero(~np.isnan(window), axis=0) >= lookback) | (size >= len(values))
+        out[lookback - len(aligned):, columns[done]] = aligned[:, done]
+        columns = columns[~done]
+        size *= 2
+    return out
+
+
+def _first_valid(values):
+    valid = ~np.isnan(values)
+    return np.where(valid.any(axis=0), valid.argmax(axis=0), len(values))
+
+
+def _ema(values, period):
+    """
+    Exponential moving average down the first axis, seeded with the SMA of each column's first
+    `period` valid rows like talib.EMA. Columns may start with NaNs (shorter histories). The Python
+    loop runs over bars only; every step updates all tickers at once.
+    """
+    alpha = 2.0 / (period + 1)
+    out = np.full(values.shape, np.nan)
+    seed_rows = _first_valid(values) + period - 1
+    ema = np.full(values.shape[1:], np.nan)
+    for i in range(period - 1, len(values)):
+        seeding = seed_rows == i
+        if seeding.any():
+            ema[seeding] = values[i - period + 1:i + 1, seeding].mean(axis=0)
+        running = seed_rows < i
+        ema[running] = alpha * values[i, running] + (1 - alpha) * ema[running]
+        out[i] = ema
+    return out
+
+
+def _rsi(values, period):
+    """
+    Wilder's RSI of the last row, computed over whatever history `values` holds. Columns may start
+    with NaNs; a column with fewer than period + 1 valid rows gets NaN.
+    """
+    diff = np.diff(values, axis=0)
+    gains = np.clip(diff, 0, None)
+    losses = np.clip(-diff, 0, None)
+    seed_rows = _first_valid(diff) + period - 1
+    avg_gain = np.full(diff.shape[1:], np.nan)
+    avg_loss = np.full(diff.shape[1:], np.nan)
+    for i in range(period - 1, len(diff)):
+        seeding = seed_rows == i
+        if seeding.any():
+            avg_gain[seeding] = gains[i - period + 1:i + 1, seeding].mean(axis=0)
+            avg_loss[seeding] = losses[i - period + 1:i + 1, seeding].mean(axis=0)
+        running = seed_rows < i
+        avg_gain[running] = (avg_gain[running] * (period - 1) + gains[i, running]) / period
+        avg_loss[running] = (avg_loss[running] * (period - 1) + losses[i, running]) / period
+    total = avg_gain + avg_loss
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # Flat prices give 0 like talib; missing averages stay NaN
+        return np.where(total > 0, 100.0 * avg_gain / total, np.where(np.isnan(total), np.nan, 0.0))
+
+
+class Screener:
+    def __init__(self, prices, sentiment=None, warmup=100):
+        """
+        Evaluate screening rules over the latest bar of every ticker at once.
+
+        Indicators are computed from trailing bars only: SMA and Bollinger Bands are exact over
+        their window, while the recursive RSI and MACD use `warmup` extra bars, after which their
+        dependence on older history is negligible.
+
+        :param prices: A dates x tickers DataFrame of adjusted close prices, or a PricePanel
+                       (its 'Adj_Close' field is used).
+        :param sentiment: Optional Series of the latest sentiment score per ticker.
+        :param warmup: Extra bars used to converge the recursive indicators (default is 100).
+        """
+        if isinstance(prices, PricePanel):
+            prices = prices.frame('Adj_Close')
+        self.prices = prices
+        self.sentiment = sentiment
+        self.warmup = warmup
+
+    def snapshot(self, sma_short=20, sma_long=50, rsi_period=14, bb_period=20, nbdev=2,
+                 fastperiod=12, slowperiod=26, signalperiod=9):
+        """
+        Compute the latest value of every indicator for all tickers.
+
+        :return: A DataFrame indexed by ticker with Adj_Close, SMA_<short>, SMA_<long>, RSI, MACD,
+                 MACD_Signal, MACD_Hist, Upper_BB, Middle_BB, Lower_BB, Bollinger_Position and Sentiment.
+        """
+        lookback = max(sma_long, bb_period, rsi_period + self.warmup, slowperiod + signalperiod + self.warmup)
+        # Each ticker's own bars, so short histories and dates missing for one ticker do not
+        # leave NaNs inside the windows
+        values = _trailing_valid(self.prices.to_numpy(dtype=np.float64), lookback)
+        last = values[-1]
+
+        window = values[-bb_period:]
+        middle = window.mean(axis=0)
+        std = window.std(axis=0)
+
+        macd_line = _ema(values, fastperiod) - _ema(values, slowperiod)
+        signal = _ema(macd_line, signalperiod)[-1]
+        macd = macd_line[-1]
+
+        snapshot = pd.DataFrame({
+            'Adj_Close': last,
+            f'SMA_{sma_short}': values[-sma_short:].mean(axis=0),
+            f'SMA_{sma_long}': values[-sma_long:].mean(axis=0),
+            'RSI': _rsi(values[-(rsi_period + self.warmup + 1):], rsi_period),
+            'MACD': macd,
+            'MACD_Signal': signal,
+            'MACD_Hist': macd - signal,
+            'Upper_BB': middle + nbdev * std,
+            'Middle_BB': middle,
+            'Lower_BB': middle - nbdev * std,
+        }, index=self.prices.columns)
+        snapshot['Bollinger_Position'] = np.select(
+            [last > snapshot['Upper_BB'].to_numpy(), last < snapshot['Lower_BB'].to_numpy()],
+            ['Upper', 'Lower'], default='Middle')
+        if self.sentiment is not None:
+            snapshot['Sentiment'] = self.sentiment.reindex(snapshot.index)
+        else:
+            snapshot['Sentiment'] = np.nan
+        return snapshot
+
+    def screen(self, rules=None, weights=None, require=None, snapshot=None, **snapshot_kwargs):
+        """
+        Evaluate rules over the latest snapshot and rank tickers by how many rules they pass.
+
+        :param rules: Dict mapping a rule name to a DataFrame.eval expression over the snapshot
+                      columns, or a list of names from RULES (default is every rule in RULES).
+        :param weights: Optional dict of rule weights for the score (default weight is 1).
+        :param require: Optional list of rule names a ticker must pass to be kept.
+        :param snapshot: Optional result of snapshot() to evaluate, e.g. kept by a long-running
+                         service whose prices do not change; it is not modified.
+        :return: The snapshot with one boolean column per rule and a 'Score' column, sorted by score.
+        """
+        if rules is None:
+            rules = RULES
+        elif not isinstance(rules, dict):
+            rules = {name: RULES[name] for name in rules}
+        weights = weights or {}
+
+        result = self.snapshot(**snapshot_kwargs) if snapshot is None else snapshot.copy()
+        score = np.zeros(len(result))
+        for name, expression in rules.items():
+            passed = result.eval(expression).fillna(False).to_numpy(dtype=bool)
+            result[name] = passed
+            score += weights.get(name, 1.0) * passed
+        result['Score'] = score
+        if require:
+            result = result[result[list(require)].all(axis=1)]
+        return result.sort_values('Score', ascending=False, kind='stable')
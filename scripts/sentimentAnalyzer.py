@@ -2,20 +2,28 @@ import pandas as pd
 from textblob import TextBlob
 import matplotlib.pyplot as plt
 import seaborn as sns
+from scripts.compactFrame import ColumnSink
+from scripts.timestamps import parse_timestamps, to_market_time
 
 class SentimentAnalyzer:
-    def __init__(self, dataframe, headline_column='headline', publisher_column='publisher',date_column='date'):
+    def __init__(self, dataframe, headline_column='headline', publisher_column='publisher',date_column='date', compact=False):
         """
         Initialize the SentimentAnalyzer with a DataFrame and the column containing headlines.
 
         :param dataframe: Input DataFrame containing the headlines.
         :param headline_column: The name of the column containing the headlines (default is 'headline').
+        :param compact: Store sentiment scores as float32 and the sentiment, weekday and month labels as categoricals (default is False).
         """
         self.dataframe = dataframe
         self.headline_column = headline_column
         self.publisher_column = publisher_column
         self.date_column=date_column
-        self.dataframe[self.date_column] = pd.to_datetime(self.dataframe[self.date_column],errors='coerce')
+        self.compact = compact
+        self.sink = ColumnSink(dataframe, compact=compact)
+        # Market-local time, so weekdays, months and daily counts follow the trading calendar.
+        # Frames from timestamps.load_news() carry the parsed 'date_utc' column already.
+        utc = self.dataframe['date_utc'] if 'date_utc' in self.dataframe.columns else parse_timestamps(self.dataframe[self.date_column])
+        self.dataframe[self.date_column] = to_market_time(utc)
 
     def calculate_sentiment(self):
         """
@@ -36,10 +44,10 @@ class SentimentAnalyzer:
                 return "Neutral"
         
         # Apply the sentiment function to the headline column
-        self.dataframe['sentiment_score'] = self.dataframe[self.headline_column].apply(get_sentiment)
+        self.sink.assign('sentiment_score', self.dataframe[self.headline_column].apply(get_sentiment))
         
         # Categorize the sentiment score
-        self.dataframe['sentiment'] = self.dataframe['sentiment_score'].apply(categorize_sentiment)
+        self.sink.assign('sentiment', self.dataframe['sentiment_score'].apply(categorize_sentiment), categorical=True)
         
         
         return self.dataframe
@@ -153,7 +161,7 @@ class SentimentAnalyzer:
         """
         Plot the distribution of publications by weekday.
         """
-        self.dataframe['weekday'] = self.dataframe[self.date_column].dt.day_name()
+        self.sink.assign('weekday', self.dataframe[self.date_column].dt.day_name(), categorical=True)
         weekday_counts = self.dataframe['weekday'].value_counts().reindex([
             'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'
         ])
@@ -169,7 +177,7 @@ class SentimentAnalyzer:
         """
         Plot the distribution of publications by month.
         """
-        self.dataframe['month'] = self.dataframe[self.date_column].dt.month_name()
+        self.sink.assign('month', self.dataframe[self.date_column].dt.month_name(), categorical=True)
         monthly_counts = self.dataframe['month'].value_counts().reindex([
             'January', 'February', 'March', 'April', 'May', 'June',
             'July', 'August', 'September', 'October', 'November', 'December'
@@ -0,0 +1,169 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from scripts.pipeline import fingerprint
+
+MARKET_TZ = 'America/New_York'
+
+# Formats found in the news corpus, most common first: (pattern, naive-part format, has UTC offset)
+FORMATS = [
+    (r'^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}[+-]\d{2}:\d{2}$', '%Y-%m-%d %H:%M:%S', True),
+    (r'^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}$', '%Y-%m-%d %H:%M:%S', False),
+    (r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}[+-]\d{2}:\d{2}$', '%Y-%m-%dT%H:%M:%S', True),
+    (r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}$', '%Y-%m-%dT%H:%M:%S', False),
+    (r'^\d{4}-\d{2}-\d{2}$', '%Y-%m-%d', False),
+]
+
+
+def detect_formats(values):
+    """
+    Assign every distinct timestamp string to one of FORMATS.
+
+    :param values: Array or Series of distinct strings.
+    :return: An int array with the index into FORMATS of each value, or -1 if none matches.
+    """
+    values = pd.Series(values, dtype=object).astype(str)
+    groups = np.full(len(values), -1)
+    for i, (pattern, _, _) in enumerate(FORMATS):
+        unassigned = groups < 0
+        if not unassigned.any():
+            break
+        matches = values[unassigned].str.match(pattern).to_numpy(dtype=bool)
+        groups[np.flatnonzero(unassigned)[matches]] = i
+    return groups
+
+
+def _parse_group(values, naive_format, has_offset, source_tz):
+    naive_length = len(pd.Timestamp(2000, 1, 1, 0, 0, 0).strftime(naive_format))
+    naive = pd.to_datetime(values.str.slice(0, naive_length), format=naive_format, errors='coerce')
+    if has_offset:
+        # '+HH:MM' suffix, applied as a vectorized timedelta instead of per-string %z parsing
+        offsets = values.str.slice(naive_length)
+        sign = np.where(offsets.str.slice(0, 1) == '-', -1, 1)
+        minutes = offsets.str.slice(1, 3).astype(int) * 60 + offsets.str.slice(4, 6).astype(int)
+        utc = naive - pd.to_timedelta(sign * minutes, unit='min')
+        return utc.dt.tz_localize('UTC')
+    return naive.dt.tz_localize(source_tz, ambiguous=True, nonexistent='shift_forward').dt.tz_convert('UTC')
+
+
+def parse_timestamps(series, source_tz=MARKET_TZ):
+    """
+    Parse timestamp strings to UTC.
+
+    Each distinct string is parsed once. Strings are grouped by the format they match and each
+    group is parsed with an explicit format; only strings matching no known format fall back to
+    format inference. Strings without a UTC offset are taken to be in source_tz; times repeated when
+    daylight saving time ends are read as the first (daylight time) occurrence, and times skipped
+    when it starts are shifted forward.
+
+    :param series: Series of timestamp strings (already parsed datetimes are converted as-is).
+    :param source_tz: Time zone of strings without an offset (default is the US market time zone).
+    :return: A tz-aware UTC Series aligned with the input; unparseable values become NaT.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        if getattr(series.dt, 'tz', None) is None:
+            return series.dt.tz_localize(source_tz, ambiguous=True, nonexistent='shift_forward').dt.tz_convert('UTC')
+        return series.dt.tz_convert('UTC')
+
+    codes, uniques = pd.factorize(series)
+    uniques = pd.Series(uniques, dtype=object).astype(str)
+    parsed = pd.Series(pd.NaT, index=uniques.index, dtype='datetime64[ns, UTC]')
+    groups = detect_formats(uniques)
+    for i, (_, naive_format, has_offset) in enumerate(FORMATS):
+        members = groups == i
+        if members.any():
+            parsed[members] = _parse_group(uniques[members], naive_format, has_offset, source_tz).to_numpy()
+    # Rare strings in other formats are inferred one by one
+    for position in np.flatnonzero(groups < 0):
+        timestamp = pd.to_datetime(uniques.iloc[position], errors='coerce')
+        if timestamp is not pd.NaT:
+            timestamp = timestamp.tz_convert('UTC') if timestamp.tzinfo else timestamp.tz_localize(source_tz, ambiguous=True, nonexistent='shift_forward').tz_convert('UTC')
+        parsed.iloc[position] = timestamp
+
+    # Missing values have code -1 and become NaT
+    return pd.Series(parsed.array.take(codes, allow_fill=True), index=series.index, name=series.name)
+
+
+def to_market_time(utc, market_tz=MARKET_TZ):
+    """
+    :return: Naive timestamps in the market's local time, e.g. for day_name() or resampling.
+    """
+    return utc.dt.tz_convert(market_tz).dt.tz_localize(None)
+
+
+def session_dates(utc, market_tz=MARKET_TZ, cutoff='16:00'):
+    """
+    Map UTC timestamps to the trading session they can affect.
+
+    News published at or after the cutoff (the market close), or on a weekend, belongs to the
+    next business day's session. Midnight timestamps, which in this corpus mark date-only
+    entries, stay on their own date.
+
+    :return: A Series of naive session dates (datetime64 at midnight).
+    """
+    local = to_market_time(utc, market_tz)
+    day = local.dt.normalize()
+    cutoff = pd.Timedelta(f'{cutoff}:00')
+    after_close = (local - day) >= cutoff
+    days = (day + pd.to_timedelta(after_close.astype(int), unit='D')).to_numpy(dtype='datetime64[D]')
+    valid = ~np.isnat(days)
+    rolled = np.full(len(days), np.datetime64('NaT'), dtype='datetime64[D]')
+    rolled[valid] = np.busday_offset(days[valid], 0, roll='forward')
+    return pd.Series(rolled.astype('datetime64[ns]'), index=utc.index, name='session_date')
+
+
+def normalize_news(dataframe, date_column='date', market_tz=MARKET_TZ, cutoff='16:00'):
+    """
+    Add parsed 'date_utc' and 'session_date' columns to a news DataFrame.
+
+    :return: The same DataFrame.
+    """
+    utc = parse_timestamps(dataframe[date_column], source_tz=market_tz)
+    dataframe['date_utc'] = utc
+    dataframe['session_date'] = session_dates(utc, market_tz=market_tz, cutoff=cutoff)
+    return dataframe
+
+
+def read_frame_cache(cache_path, source_path, key):
+    """
+    Read a frame written by write_frame_cache().
+
+    :param key: Fingerprint of the settings the frame was built with.
+    :return: The cached frame, or None if it is missing, older than source_path or built with another key.
+    """
+    if not os.path.exists(cache_path) or os.path.getmtime(cache_path) < os.path.getmtime(source_path):
+        return None
+    cached = pd.read_pickle(cache_path)
+    if not (isinstance(cached, tuple) and len(cached) == 2 and cached[0] == key):
+        return None
+    return cached[1]
+
+
+def write_frame_cache(cache_path, key, dataframe):
+    """
+    Atomically save a frame together with the key read_frame_cache() checks.
+    """
+    tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+    pd.to_pickle((key, dataframe), tmp_path)
+    os.replace(tmp_path, cache_path)
+
+
+def load_news(csv_path, cache_path=None, date_column='date', **read_csv_kwargs):
+    """
+    Load the news CSV with its timestamps normalized once.
+
+    The normalized frame is saved to cache_path (default is the CSV path with '.parsed.pkl'
+    appended) and reused on later loads as long as it is newer than the CSV and was built with
+    the same date_column and read_csv_kwargs, so parsing is skipped.
+
+    :return: The news DataFrame with 'date_utc' and 'session_date' columns.
+    """
+    cache_path = cache_path or f'{csv_path}.parsed.pkl'
+    key = fingerprint([date_column, read_csv_kwargs])
+    dataframe = read_frame_cache(cache_path, csv_path, key)
+    if dataframe is None:
+        dataframe = normalize_news(pd.read_csv(csv_path, **read_csv_kwargs), date_column=date_column)
+        write_frame_cache(cache_path, key, dataframe)
+    return dataframe
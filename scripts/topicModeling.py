@@ -1,3 +1,7 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 import pandas as pd
 from sklearn.feature_extraction.text import CountVectorizer
 from sklearn.decomposition import LatentDirichletAllocation
@@ -5,8 +9,29 @@ import nltk
 from nltk.corpus import stopwords
 import string
 
+from scripts.timestamps import parse_timestamps, session_dates
+
 nltk.download('stopwords')
 
+
+def _fit_group(texts, num_topics, num_words, max_features, random_state):
+    """
+    Fit one LDA model on the cleaned headlines of a group.
+
+    :return: (document-topic distributions as a float32 array, list of top words per topic),
+             or (None, []) if the group has no usable vocabulary.
+    """
+    vectorizer = CountVectorizer(max_features=max_features)
+    try:
+        X = vectorizer.fit_transform(texts)
+    except ValueError:
+        return None, []
+    lda = LatentDirichletAllocation(n_components=num_topics, random_state=random_state)
+    doc_topics = lda.fit_transform(X).astype(np.float32)
+    words = vectorizer.get_feature_names_out()
+    topics = [[words[i] for i in topic.argsort()[:-num_words - 1:-1]] for topic in lda.components_]
+    return doc_topics, topics
+
 class TopicModeling:
     def __init__(self, dataframe, headline_column='headline'):
         """
@@ -79,3 +104,78 @@ class TopicModeling:
             topics.append(top_words)
 
         return topics
+
+    def fit_group_topic_models(self, group_column='stock', sectors=None, num_topics=5, num_words=10,
+                               min_documents=50, max_features=5000, workers=None, random_state=42):
+        """
+        Fit a separate LDA model per ticker (or per sector) in a process pool and keep the
+        document-topic distributions.
+
+        Topic numbers are local to a group: topic 0 of one ticker is unrelated to topic 0 of another.
+
+        :param group_column: Column holding each headline's ticker (default is 'stock').
+        :param sectors: Optional dict mapping ticker to sector; one model is then fitted per sector.
+        :param num_topics: The number of topics per group (default is 5).
+        :param num_words: The number of words to keep per topic (default is 10).
+        :param min_documents: Groups with fewer headlines are skipped (default is 50).
+        :param max_features: Vocabulary size per group (default is 5000).
+        :param workers: Number of worker processes (default is the CPU count; 1 runs in-process).
+        :return: A dict mapping each fitted group to its list of topics (lists of words).
+        """
+        self.dataframe['cleaned_headline'] = self.dataframe[self.headline_column].apply(self.preprocess_text)
+        groups = self.dataframe[group_column]
+        if sectors is not None:
+            groups = groups.map(sectors)
+        rows = {group: index for group, index in groups.groupby(groups, sort=False).indices.items()
+                if len(index) >= min_documents}
+        # Largest groups first so the pool is not left waiting on one big model at the end
+        order = sorted(rows, key=lambda group: len(rows[group]), reverse=True)
+        texts = self.dataframe['cleaned_headline'].to_numpy()
+        args = [(texts[rows[group]], num_topics, num_words, max_features, random_state) for group in order]
+
+        workers = min(workers or os.cpu_count() or 1, max(len(args), 1))
+        if workers <= 1:
+            outputs = [_fit_group(*arg) for arg in args]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                outputs = list(executor.map(_fit_group, *zip(*args)))
+
+        self.document_topics = np.full((len(self.dataframe), num_topics), np.nan, dtype=np.float32)
+        self.document_groups = groups.to_numpy()
+        self.group_topics = {}
+        for group, (doc_topics, topics) in zip(order, outputs):
+            if doc_topics is None:
+                continue
+            self.document_topics[rows[group]] = doc_topics
+            self.group_topics[group] = topics
+        return self.group_topics
+
+    def topic_sentiment(self, sentiment_column='sentiment_score', date_column='date'):
+        """
+        Daily sentiment per group and topic: the mean sentiment of the day's headlines weighted by
+        each headline's share of the topic. Requires fit_group_topic_models() and a sentiment score
+        per headline (e.g. from SentimentAnalyzer.calculate_sentiment()).
+
+        Days are trading sessions, as in SentimentBacktester.signal_from_news(). For one topic,
+        result.xs(topic, axis=1, level='topic') is a dates x groups panel that can be passed to
+        rolling_correlation() together with daily returns.
+
+        :return: A DataFrame indexed by session date with (group, topic) columns; NaN where a
+                 group has no headlines on a day.
+        """
+        if 'session_date' in self.dataframe.columns:
+            days = self.dataframe['session_date']
+        else:
+            days = session_dates(parse_timestamps(self.dataframe[date_column]))
+        scores = self.dataframe[sentiment_column].to_numpy(dtype=np.float32)
+        fitted = ~np.isnan(self.document_topics).any(axis=1) & ~np.isnan(scores) & days.notna().to_numpy()
+
+        weights = self.document_topics[fitted]
+        weighted = weights * scores[fitted, None]
+        num_topics = weights.shape[1]
+        keys = [self.document_groups[fitted], days.to_numpy()[fitted]]
+        sums = pd.DataFrame(np.hstack([weighted, weights]), columns=range(2 * num_topics)).groupby(keys).sum()
+        result = pd.DataFrame(sums.iloc[:, :num_topics].to_numpy() / sums.iloc[:, num_topics:].to_numpy(),
+                              index=sums.index, columns=pd.Index(range(num_topics), name='topic'))
+        result.index.names = ['group', 'date']
+        return result.unstack('group').swaplevel(axis=1).sort_index(axis=1)
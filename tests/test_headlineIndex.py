@@ -0,0 +1,20 @@
+import numpy as np
+import pandas as pd
+
+from scripts.headlineIndex import HeadlineIndex
+
+
+def _news():
+    return pd.DataFrame({
+        'headline': ['Apple beats estimates', 'Agilent cuts outlook', 'Apple cuts prices', 'Amazon beats estimates'],
+        'stock': ['AAPL', 'A', 'AAPL', 'AMZN'],
+        'date': ['2020-06-01 10:00:00-04:00'] * 4,
+    })
+
+
+def test_single_stock_string_matches_that_ticker():
+    index = HeadlineIndex.build(_news())
+
+    assert np.array_equal(index.search(stocks='AAPL'), [0, 2])
+    assert np.array_equal(index.search(stocks='AAPL'), index.search(stocks=['AAPL']))
+    assert np.array_equal(index.search(all_of='cuts', stocks='A'), [1])
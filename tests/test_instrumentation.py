@@ -0,0 +1,39 @@
+import tracemalloc
+
+from scripts.instrumentation import PipelineProfiler
+
+
+def test_tracing_stops_after_the_last_stage():
+    assert not tracemalloc.is_tracing()
+    profiler = PipelineProfiler(track_memory=True)
+    with profiler.stage('outer'):
+        with profiler.stage('inner'):
+            data = [0] * 100000
+        assert tracemalloc.is_tracing()
+    assert not tracemalloc.is_tracing()
+    inner, outer = profiler.records
+    assert inner['peak_memory_bytes'] >= 800000
+    assert outer['peak_memory_bytes'] >= inner['peak_memory_bytes']
+    del data
+
+
+def test_tracing_started_elsewhere_is_left_running():
+    tracemalloc.start()
+    try:
+        with PipelineProfiler(track_memory=True).stage('load'):
+            pass
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+
+def test_positional_ticker_labels_the_stage():
+    profiler = PipelineProfiler()
+
+    @profiler.profile()
+    def fetch(ticker, start=None):
+        return ticker
+
+    fetch('AAPL')
+    fetch(ticker='MSFT', start='2020-01-01')
+    assert [record['ticker'] for record in profiler.records] == ['AAPL', 'MSFT']
@@ -0,0 +1,37 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.newsStream import NewsIngestionService
+
+
+class _ListFeed:
+    def __init__(self, items):
+        self.items = items
+
+    async def __aiter__(self):
+        for item in self.items:
+            yield item
+
+
+def test_state_stays_bounded_and_correlation_uses_recent_days():
+    rng = np.random.default_rng(5)
+    days = pd.bdate_range('2020-01-01', periods=200)
+    scores = rng.normal(size=len(days))
+    items = [{'headline': 'h', 'date': f'{day.date()} 10:00:00-05:00', 'stock': 'A', 'score': score}
+             for day, score in zip(days, scores)]
+    # A headline for a day older than every retained day arrives last and is skipped
+    service = NewsIngestionService(_ListFeed(items + [dict(items[0])]),
+                                   scorer=lambda frame: frame['score'].to_numpy(),
+                                   batch_size=16, max_batch_delay=0.01, correlation_window=20)
+    returns = scores + rng.normal(size=len(days))
+    for day, value in zip(days, returns):
+        service.update_return('A', day, value)
+    asyncio.run(service.run())
+
+    assert len(service.stock_days['A']) == len(service.sentiment_sum) == service.max_days == 40
+    assert len(service.returns) == 40
+    assert service.rolling_correlation('A') == pytest.approx(np.corrcoef(scores[-20:], returns[-20:])[0, 1])
+    assert service.late_headlines == 1
@@ -0,0 +1,102 @@
+import json
+import os
+import subprocess
+import sys
+import textwrap
+import types
+
+import pandas as pd
+
+from scripts.pipeline import Stage, is_settled
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Stage functions define nested functions and frozenset constants, whose reprs differ between
+# processes; the fingerprints must not.
+SCRIPT = textwrap.dedent('''
+    import json, sys
+    import pandas as pd
+    from scripts.pipeline import Pipeline, Stage
+
+    def load(n):
+        return pd.DataFrame({'x': range(n)})
+
+    def score(frame):
+        def square(value):
+            return value * value
+        return frame['x'].map(square)
+
+    def total(scores, labels=('a', 'b')):
+        return float(scores.sum()) if labels[0] in {'a', 'b', 'c'} else 0.0
+
+    pipeline = Pipeline([
+        Stage('load', load, params={'n': 10}),
+        Stage('score', score, inputs=('load',)),
+        Stage('total', total, inputs=('score',)),
+    ], cache_dir=sys.argv[1])
+    outputs = pipeline.run()
+    print(json.dumps({'executed': sorted(pipeline.executed), 'cache_hits': sorted(pipeline.cache_hits),
+                      'total': outputs['total']}))
+''')
+
+
+def _run(cache_dir, seed):
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT, PYTHONHASHSEED=str(seed))
+    result = subprocess.run([sys.executable, '-c', SCRIPT, str(cache_dir)], cwd=REPO_ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_cached_stages_are_reused_across_processes(tmp_path):
+    first = _run(tmp_path, seed=1)
+    second = _run(tmp_path, seed=2)
+
+    assert first['executed'] == ['load', 'score', 'total']
+    assert second['executed'] == []
+    assert second['cache_hits'] == ['load', 'score', 'total']
+    assert second['total'] == first['total'] == 285.0
+
+
+HELPERS = textwrap.dedent('''
+    SCALE = {scale}
+
+    def helper(value):
+        return value * SCALE + {offset}
+
+    class Model:
+        def predict(self, value):
+            return helper(value)
+
+    def stage(value):
+        return helper(value)
+
+    def model_stage(value):
+        return Model().predict(value)
+''')
+
+
+def _module(scale=2, offset=0):
+    module = types.ModuleType('fingerprint_fixture.stages')
+    exec(HELPERS.format(scale=scale, offset=offset), module.__dict__)
+    return module
+
+
+def test_fingerprint_follows_called_helpers_and_constants():
+    base = _module()
+    same = _module()
+    changed_helper = _module(offset=1)
+    changed_constant = _module(scale=3)
+
+    assert Stage('s', base.stage).version == Stage('s', same.stage).version
+    assert Stage('s', base.stage).version != Stage('s', changed_helper.stage).version
+    assert Stage('s', base.stage).version != Stage('s', changed_constant.stage).version
+    assert Stage('s', base.model_stage).version != Stage('s', changed_helper.model_stage).version
+    assert Stage('s', base.Model).version != Stage('s', changed_helper.Model).version
+
+
+def test_only_past_ranges_are_settled():
+    today = pd.Timestamp.today().normalize()
+    assert is_settled('2020-01-31')
+    assert not is_settled(today.strftime('%Y-%m-%d'))
+    assert not is_settled((today + pd.Timedelta(days=30)).strftime('%Y-%m-%d'))
+    assert not is_settled(None)
@@ -0,0 +1,23 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from scripts.rollingCorrelation import rolling_correlation
+
+
+def test_ticker_without_news_is_nan_without_warnings():
+    rng = np.random.default_rng(3)
+    dates = pd.bdate_range('2020-01-01', periods=120)
+    returns = pd.DataFrame(rng.normal(size=(120, 2)), index=dates, columns=['NEWS', 'QUIET'])
+    sentiment = returns * 0.5 + rng.normal(size=(120, 2))
+    sentiment.iloc[::4, 0] = np.nan
+    sentiment['QUIET'] = np.nan
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        result = rolling_correlation(sentiment, returns, window=20)
+
+    expected = sentiment['NEWS'].rolling(20, min_periods=10).corr(returns['NEWS'])
+    assert np.allclose(result['NEWS'], expected, equal_nan=True)
+    assert result['QUIET'].isna().all()
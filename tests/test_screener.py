@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.screener import Screener, _trailing_valid
+
+
+def _prices():
+    rng = np.random.default_rng(7)
+    dates = pd.bdate_range('2019-01-01', periods=300)
+    prices = pd.DataFrame({
+        'LONG': 100 + rng.normal(size=300).cumsum(),
+        'SHORT': 50 + rng.normal(size=300).cumsum(),
+        'GAP': 80 + rng.normal(size=300).cumsum(),
+        'TINY': 20 + rng.normal(size=300).cumsum(),
+    }, index=dates)
+    prices.iloc[:200, 1] = np.nan  # 100-bar history
+    prices.iloc[250, 2] = np.nan   # one date missing from the union
+    prices.iloc[:290, 3] = np.nan  # too short for any indicator but the close
+    return prices
+
+
+def _wilder_rsi(prices, period=14):
+    diff = np.diff(prices)
+    gains, losses = np.clip(diff, 0, None), np.clip(-diff, 0, None)
+    avg_gain, avg_loss = gains[:period].mean(), losses[:period].mean()
+    for gain, loss in zip(gains[period:], losses[period:]):
+        avg_gain = (avg_gain * (period - 1) + gain) / period
+        avg_loss = (avg_loss * (period - 1) + loss) / period
+    return 100.0 * avg_gain / (avg_gain + avg_loss)
+
+
+def test_short_and_gapped_histories_use_their_own_bars():
+    prices = _prices()
+    snapshot = Screener(prices).snapshot()
+
+    for ticker in ['SHORT', 'GAP']:
+        own = prices[ticker].dropna()
+        alone = Screener(own.to_frame()).snapshot().loc[ticker]
+        assert snapshot.loc[ticker, 'RSI'] == pytest.approx(alone['RSI'])
+        assert snapshot.loc[ticker, 'MACD'] == pytest.approx(alone['MACD'])
+        assert snapshot.loc[ticker, 'SMA_50'] == pytest.approx(own.tail(50).mean())
+
+    # The 100-bar ticker is covered entirely by the lookback, so its RSI is exact
+    assert snapshot.loc['SHORT', 'RSI'] == pytest.approx(_wilder_rsi(prices['SHORT'].dropna().to_numpy()))
+    assert np.isfinite(snapshot.loc[['SHORT', 'GAP'], ['MACD', 'MACD_Signal']].to_numpy()).all()
+
+
+def test_trailing_window_matches_whole_history():
+    values = _prices().to_numpy(copy=True)
+    values[-150:-1, 0] = np.nan  # a long gap near the end, so the window has to widen
+    for lookback in [5, 135, 400]:
+        expected = np.full((lookback, values.shape[1]), np.nan)
+        for column in range(values.shape[1]):
+            own = values[:, column][~np.isnan(values[:, column])][-lookback:]
+            expected[lookback - len(own):, column] = own
+        assert np.array_equal(_trailing_valid(values, lookback), expected, equal_nan=True)
+
+
+def test_insufficient_history_gives_nan_not_a_signal():
+    snapshot = Screener(_prices()).screen(['RSI_Oversold', 'MACD_Trend'])
+    tiny = snapshot.loc['TINY']
+    assert np.isnan(tiny['RSI']) and np.isnan(tiny['MACD'])
+    assert not tiny['RSI_Oversold'] and not tiny['MACD_Trend']
+
+
+def test_matches_talib_for_short_history():
+    talib = pytest.importorskip('talib')
+    prices = _prices()
+    snapshot = Screener(prices).snapshot()
+
+    for ticker in ['LONG', 'SHORT', 'GAP']:
+        own = prices[ticker].dropna().to_numpy()
+        macd, signal, _ = talib.MACD(own, fastperiod=12, slowperiod=26, signalperiod=9)
+        upper, middle, lower = talib.BBANDS(own, timeperiod=20, nbdevup=2, nbdevdn=2)
+        assert snapshot.loc[ticker, 'RSI'] == pytest.approx(talib.RSI(own, timeperiod=14)[-1], abs=1e-6)
+        assert snapshot.loc[ticker, 'MACD'] == pytest.approx(macd[-1], abs=1e-4)
+        assert snapshot.loc[ticker, 'MACD_Signal'] == pytest.approx(signal[-1], abs=1e-4)
+        assert snapshot.loc[ticker, 'SMA_20'] == pytest.approx(talib.SMA(own, timeperiod=20)[-1])
+        assert snapshot.loc[ticker, 'Upper_BB'] == pytest.approx(upper[-1])
@@ -0,0 +1,41 @@
+import pandas as pd
+
+from scripts.timestamps import load_news, parse_timestamps
+
+
+def _write_news(path):
+    pd.DataFrame({
+        'headline': [f'headline {i}' for i in range(6)],
+        'date': ['2020-06-01 09:30:00-04:00'] * 3 + ['2020-06-02 17:00:00-04:00'] * 3,
+        'published': ['2020-06-01'] * 6,
+        'stock': ['A'] * 6,
+    }).to_csv(path, index=False)
+
+
+def test_cache_is_not_reused_with_other_read_options(tmp_path):
+    path = tmp_path / 'news.csv'
+    _write_news(path)
+
+    assert len(load_news(path, nrows=3)) == 3
+    assert len(load_news(path)) == 6
+    assert len(load_news(path, nrows=3)) == 3
+
+
+def test_cache_is_not_reused_with_another_date_column(tmp_path):
+    path = tmp_path / 'news.csv'
+    _write_news(path)
+
+    by_date = load_news(path)
+    by_published = load_news(path, date_column='published')
+
+    assert by_date['session_date'].nunique() == 2
+    assert (by_published['session_date'] == pd.Timestamp('2020-06-01')).all()
+
+
+def test_fall_back_hour_is_read_as_daylight_time():
+    naive = pd.Series(['2020-11-01 01:30:00', '2020-11-01T01:30:00', '2020-11-01 01:30', '2020-11-01 03:00:00'])
+    parsed = parse_timestamps(naive)
+    expected = pd.Timestamp('2020-11-01 05:30', tz='UTC')
+    assert (parsed.iloc[:3] == expected).all()
+    assert parsed.iloc[3] == pd.Timestamp('2020-11-01 08:00', tz='UTC')
+    assert parse_timestamps(pd.to_datetime(naive.iloc[:1])).iloc[0] == expected